@@ -0,0 +1,215 @@
+"""Placement search and autoplay. Does not import pygame.
+
+The planner works on the row bitmasks of a board (see board.py). Every
+final placement of a piece is one distinct rotation dropped straight down
+in one column; placements that produce the same board are merged. Boards
+are scored with a weighted sum of features, and scores are kept in a
+bounded cache keyed by the board rows, so positions reached again through
+different move orders are only evaluated once.
+"""
+from functools import lru_cache
+
+from tetromino import Tetromino
+from game import MOVE_LEFT, MOVE_RIGHT, ROTATE, HARD_DROP
+
+# Feature weights: completed lines, summed column heights, covered empty
+# cells and the height difference between neighbouring columns
+DEFAULT_WEIGHTS = {
+    'lines': 0.76,
+    'height': -0.51,
+    'holes': -0.36,
+    'bumpiness': -0.18,
+}
+
+# Score of a placement that tops out; worse than any real board
+LOSS = float('-inf')
+
+
+def _distinct_rotations(shape_idx):
+    """(rotation, PieceState) pairs with duplicate shapes removed (O has one, I/S/Z two)"""
+    seen = set()
+    out = []
+    for rotation, state in enumerate(Tetromino.ROTATIONS[shape_idx]):
+        if state.masks not in seen:
+            seen.add(state.masks)
+            out.append((rotation, state))
+    return out
+
+
+ROTATIONS = tuple(_distinct_rotations(i) for i in range(len(Tetromino.SHAPES)))
+
+
+def surface(rows, width):
+    """Column heights and hole count of a board given as a tuple of row masks"""
+    height = len(rows)
+    heights = [0] * width
+    covered = 0
+    holes = 0
+    for y, row in enumerate(rows):
+        new = row & ~covered
+        if new:
+            x = 0
+            while new:
+                if new & 1:
+                    heights[x] = height - y
+                new >>= 1
+                x += 1
+            covered |= row
+        holes += bin(covered & ~row).count('1')
+    return heights, holes
+
+
+def drop(rows, heights, state, x):
+    """Drop a piece straight down in column `x`.
+
+    Returns (rows, cleared) for the resulting board, or None when the piece
+    cannot enter the board there.
+    """
+    height = len(rows)
+    y = height
+    for dx, bottom in state.bottoms:
+        row = height - heights[x + dx] - 1 - bottom
+        if row < y:
+            y = row
+    if y < 0:
+        return None
+    new = list(rows)
+    for dy, mask in enumerate(state.masks):
+        new[y + dy] |= mask << x
+    full = (1 << len(heights)) - 1
+    if full not in new:
+        return tuple(new), 0
+    kept = [row for row in new if row != full]
+    cleared = height - len(kept)
+    return (0,) * cleared + tuple(kept), cleared
+
+
+def placements(rows, heights, shape_idx):
+    """Every distinct final board for a piece as (rotation, x, rows, cleared) tuples"""
+    width = len(heights)
+    results = {}
+    for rotation, state in ROTATIONS[shape_idx]:
+        for x in range(width - state.width + 1):
+            dropped = drop(rows, heights, state, x)
+            if dropped is not None and dropped[0] not in results:
+                results[dropped[0]] = (rotation, x, dropped[0], dropped[1])
+    return list(results.values())
+
+
+class Planner:
+    """Chooses where to put the falling piece.
+
+    With `lookahead` the next piece is placed on each of the `beam` best
+    boards as well, and a placement is scored by the best board reachable
+    with both pieces. `cache_size` bounds the number of evaluated boards kept.
+    """
+
+    def __init__(self, weights=None, lookahead=True, beam=8, cache_size=1 << 16):
+        self.weights = dict(DEFAULT_WEIGHTS)
+        if weights:
+            unknown = set(weights) - set(DEFAULT_WEIGHTS)
+            if unknown:
+                raise ValueError(f"Unknown weights {sorted(unknown)}; use {sorted(DEFAULT_WEIGHTS)}")
+            self.weights.update(weights)
+        self.lookahead = lookahead
+        self.beam = beam
+        self._analyse = lru_cache(maxsize=cache_size)(self._analyse_board)
+
+    def _analyse_board(self, rows, width):
+        heights, holes = surface(rows, width)
+        if rows[0]:
+            return LOSS, heights
+        w = self.weights
+        bumpiness = sum(abs(heights[x] - heights[x + 1]) for x in range(width - 1))
+        score = w['height'] * sum(heights) + w['holes'] * holes + w['bumpiness'] * bumpiness
+        return score, heights
+
+    def evaluate(self, rows, width):
+        """Score of a board without its line clears; cached by board rows"""
+        return self._analyse(rows, width)[0]
+
+    def cache_info(self):
+        return self._analyse.cache_info()
+
+    def _ranked(self, rows, heights, shape_idx):
+        """Placements of one piece with their score, best first"""
+        width = len(heights)
+        lines = self.weights['lines']
+        ranked = []
+        for rotation, x, new_rows, cleared in placements(rows, heights, shape_idx):
+            score, new_heights = self._analyse(new_rows, width)
+            ranked.append((score + lines * cleared, rotation, x, new_rows, new_heights))
+        ranked.sort(key=lambda entry: entry[0], reverse=True)
+        return ranked
+
+    def best(self, state):
+        """Best (rotation, x) for the falling piece of a GameState, or None if every placement loses"""
+        grid = state.grid
+        ranked = self._ranked(tuple(grid.rows), grid.heights, state.current_piece.shape_idx)
+        if not ranked or ranked[0][0] == LOSS:
+            return None
+        if not self.lookahead:
+            return ranked[0][1], ranked[0][2]
+
+        best_score = LOSS
+        best = ranked[0][1], ranked[0][2]
+        for score, rotation, x, rows, heights in ranked[:self.beam]:
+            if score == LOSS:
+                break
+            follow = self._ranked(rows, heights, state.next_piece.shape_idx)
+            # The first piece's line clears count towards the total as well
+            total = (score - self.evaluate(rows, len(heights)) + follow[0][0]) if follow else LOSS
+            if total > best_score:
+                best_score = total
+                best = rotation, x
+        return best
+
+    def plan(self, state):
+        """Actions that take the falling piece from its current position to the best placement"""
+        target = self.best(state)
+        if target is None:
+            return [HARD_DROP]
+        rotation, x = target
+        piece = state.current_piece
+        actions = [ROTATE] * ((rotation - piece.rotation) % 4)
+        dx = x - piece.x
+        actions += [MOVE_RIGHT if dx > 0 else MOVE_LEFT] * abs(dx)
+        actions.append(HARD_DROP)
+        return actions
+
+
+class AutoPlayer:
+    """Policy that plays a GameState with a Planner.
+
+    Called once per step, it returns the actions for that step. With
+    `interval` 0 a whole placement is made in one step; otherwise one action
+    is issued every `interval` steps so the moves can be watched.
+    `enabled` is only a flag for front ends that let the player take over.
+    """
+
+    def __init__(self, planner=None, interval=0, enabled=True):
+        self.planner = planner or Planner()
+        self.interval = interval
+        self.enabled = enabled
+        self._queue = []
+        self._piece = None
+        self._wait = 0
+
+    def toggle(self):
+        """Switch on or off; the falling piece is planned again from where it is now"""
+        self.enabled = not self.enabled
+        self._piece = None
+
+    def __call__(self, state):
+        if state.current_piece is not self._piece:
+            self._piece = state.current_piece
+            self._queue = self.planner.plan(state)
+            self._wait = 0
+        if not self.interval:
+            actions, self._queue = self._queue, []
+            return actions
+        if self._wait > 0 or not self._queue:
+            self._wait -= 1
+            return ()
+        self._wait = self.interval - 1
+        return (self._queue.pop(0),)
@@ -0,0 +1,144 @@
+"""Vectorized engine that plays N boards in lockstep. Requires numpy."""
+import numpy as np
+
+from tetromino import Tetromino
+
+
+def _piece_tables():
+    """Cell offsets and sizes of every rotation state as (shape, rotation, ...) arrays"""
+    rotations = Tetromino.ROTATIONS
+    count = len(rotations)
+    cell_x = np.zeros((count, 4, 4), dtype=np.int64)
+    cell_y = np.zeros((count, 4, 4), dtype=np.int64)
+    widths = np.zeros((count, 4), dtype=np.int64)
+    for shape_idx, states in enumerate(rotations):
+        for rotation, state in enumerate(states):
+            cell_x[shape_idx, rotation] = [x for x, _ in state.cells]
+            cell_y[shape_idx, rotation] = [y for _, y in state.cells]
+            widths[shape_idx, rotation] = state.width
+    return cell_x, cell_y, widths
+
+
+CELL_X, CELL_Y, WIDTHS = _piece_tables()
+
+
+class BatchBoards:
+    """N boards held as one (N, height, width) uint8 array of color indices.
+
+    Pieces are placed by hard drop: each board gets a rotation and a
+    column, and landing, locking, line clears and game-over checks are
+    computed for all boards at once.
+    """
+
+    def __init__(self, n, width=10, height=20, seed=None):
+        self.n = n
+        self.width = width
+        self.height = height
+        self.rng = np.random.default_rng(seed)
+        self.boards = np.zeros((n, height, width), dtype=np.uint8)
+        self.score = np.zeros(n, dtype=np.int64)
+        self.lines = np.zeros(n, dtype=np.int64)
+        self.pieces = np.zeros(n, dtype=np.int64)
+        self.alive = np.ones(n, dtype=bool)
+        self.current = self._new_pieces()
+        self.next = self._new_pieces()
+        self._index = np.arange(n)
+
+    def _new_pieces(self):
+        return self.rng.integers(0, len(Tetromino.SHAPES), self.n)
+
+    def _cells(self, shapes, rotations, xs, ys):
+        cx = xs[:, None] + CELL_X[shapes, rotations]
+        cy = ys[:, None] + CELL_Y[shapes, rotations]
+        return cx, cy
+
+    def spawn_columns(self, shapes):
+        """Column each piece starts in, matching Tetromino's spawn position"""
+        return self.width // 2 - WIDTHS[shapes, 0] // 2
+
+    def max_columns(self, shapes, rotations):
+        """Right-most legal column for each piece"""
+        return self.width - WIDTHS[shapes, rotations]
+
+    def collides(self, shapes, rotations, xs, ys):
+        """Return a bool array, True where the piece overlaps a block or leaves the board"""
+        cx, cy = self._cells(np.asarray(shapes), np.asarray(rotations), np.asarray(xs), np.asarray(ys))
+        outside = (cx < 0) | (cx >= self.width) | (cy >= self.height)
+        above = cy < 0
+        cxc = np.clip(cx, 0, self.width - 1)
+        cyc = np.clip(cy, 0, self.height - 1)
+        occupied = self.boards[self._index[:, None], cyc, cxc] != 0
+        return (outside | (occupied & ~above)).any(axis=1)
+
+    def column_tops(self):
+        """Row index of the highest block in each column, `height` for empty columns"""
+        filled = self.boards != 0
+        return np.where(filled.any(axis=1), filled.argmax(axis=1), self.height)
+
+    def landing_rows(self, shapes, rotations, xs):
+        """Row at which each piece comes to rest when dropped straight down from row 0.
+
+        A result of -1 means the piece already collides at the spawn row.
+        """
+        shapes = np.asarray(shapes)
+        rotations = np.asarray(rotations)
+        xs = np.asarray(xs)
+        cy = CELL_Y[shapes, rotations]
+        cx = xs[:, None] + CELL_X[shapes, rotations]
+        # Gather just the columns under each piece cell, as (N, 4, height),
+        # and ignore rows above the cell; the first remaining block is where
+        # that cell stops.
+        columns = self.boards[self._index[:, None], :, cx] != 0
+        columns &= np.arange(self.height)[None, None, :] >= cy[:, :, None]
+        first = np.where(columns.any(axis=2), columns.argmax(axis=2), self.height)
+        return (first - cy - 1).min(axis=1)
+
+    def drop(self, shapes, rotations, xs):
+        """Hard-drop one piece on every live board and return rows cleared per board.
+
+        Boards whose piece cannot enter the field are marked dead and left
+        untouched. Raises ValueError if a column is out of range.
+        """
+        shapes = np.asarray(shapes)
+        rotations = np.asarray(rotations) % 4
+        xs = np.asarray(xs)
+        bad = (xs < 0) | (xs > self.max_columns(shapes, rotations))
+        if (bad & self.alive).any():
+            raise ValueError("Placement column out of range")
+        xs = np.where(bad, 0, xs)
+
+        ys = self.landing_rows(shapes, rotations, xs)
+        self.alive &= ys >= 0
+        live = np.flatnonzero(self.alive)
+        if live.size:
+            cx, cy = self._cells(shapes[live], rotations[live], xs[live], ys[live])
+            self.boards[live[:, None], cy, cx] = (shapes[live] + 1)[:, None].astype(np.uint8)
+            self.pieces[live] += 1
+
+        cleared = self.clear_lines()
+        self.score += cleared * 10
+        self.lines += cleared
+        self.alive &= ~(self.boards[:, 0, :] != 0).any(axis=1)
+        return cleared
+
+    def clear_lines(self):
+        """Remove full rows on every board at once and return the count per board"""
+        full = (self.boards != 0).all(axis=2)
+        counts = full.sum(axis=1)
+        hit = np.flatnonzero(counts)
+        if not hit.size:
+            return counts
+        # A stable sort on "not full" moves full rows to the top in order
+        # while keeping the remaining rows in their original order.
+        order = np.argsort(~full[hit], axis=1, kind='stable')
+        boards = np.take_along_axis(self.boards[hit], order[:, :, None], axis=1)
+        boards[np.arange(self.height)[None, :] < counts[hit][:, None]] = 0
+        self.boards[hit] = boards
+        return counts
+
+    def step(self, rotations, xs):
+        """Drop the current piece of every board at the chosen rotation/column and advance the queue"""
+        cleared = self.drop(self.current, rotations, xs)
+        self.current = np.where(self.alive, self.next, self.current)
+        self.next = np.where(self.alive, self._new_pieces(), self.next)
+        return cleared
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+"""Benchmarks for the engine and renderer hot paths.
+
+Rendering runs under SDL's dummy video driver, so no window is needed.
+The whole suite runs several rounds; each result is the median of the
+rounds, with every round kept under `samples`. Results are written as JSON
+and can be compared against a stored baseline:
+
+    python bench.py --output bench.json
+    python bench.py --baseline bench_baseline.json      # exit 1 on regression
+    python bench.py --save-baseline bench_baseline.json
+"""
+import os
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+
+import pygame
+
+from board import create_grid, valid_space, check_lost, clear_rows
+from tetromino import Tetromino
+from game import GameState
+from lib import draw_grid, draw_tetromino, draw_score
+from renderer import Renderer
+
+BLOCK_SIZE = 30
+WIDTH = 10
+HEIGHT = 20
+MIN_RUN_TIME = 0.02  # seconds; shorter timing runs measure the scheduler more than the code
+
+
+def _fill(grid, rows, rng, holes=1):
+    """Fill the bottom `rows` rows, leaving `holes` random gaps in each"""
+    for y in range(HEIGHT - rows, HEIGHT):
+        gaps = set(rng.sample(range(WIDTH), holes)) if holes else set()
+        for x in range(WIDTH):
+            if x not in gaps:
+                grid[y][x] = rng.randint(1, len(Tetromino.SHAPES))
+    return grid
+
+
+def make_fixtures():
+    """Deterministic boards covering the shapes the game actually sees"""
+    rng = random.Random(1234)
+    return {
+        'empty': create_grid(WIDTH, HEIGHT),
+        'half_full': _fill(create_grid(WIDTH, HEIGHT), HEIGHT // 2, rng),
+        'near_top': _fill(create_grid(WIDTH, HEIGHT), HEIGHT - 2, rng),
+        'multi_clear': _fill(_fill(create_grid(WIDTH, HEIGHT), 8, rng), 4, rng, holes=0),
+    }
+
+
+def _timer(func, number, calls=1):
+    """One timing run of `func`, returning microseconds per call, for `_best` to repeat.
+
+    `func` runs `number` times per run, or more if that would take less than
+    MIN_RUN_TIME; `calls` is how many calls one `func()` stands for.
+    """
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    elapsed = time.perf_counter() - start
+    if elapsed < MIN_RUN_TIME:
+        number = int(number * MIN_RUN_TIME / max(elapsed, 1e-9)) + 1
+
+    def timed():
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return (time.perf_counter() - start) / (number * calls) * 1e6
+    return timed
+
+
+def _copies_timer(func, board, number):
+    """Like _timer for functions that mutate a board; copies are made outside the timed loop.
+
+    A run times batches of `number` copies until MIN_RUN_TIME has been spent
+    in `func`, so fast functions do not need all their copies at once.
+    """
+    def timed():
+        elapsed = 0.0
+        calls = 0
+        while elapsed < MIN_RUN_TIME:
+            boards = [board.copy() for _ in range(number)]
+            start = time.perf_counter()
+            for b in boards:
+                func(b)
+            elapsed += time.perf_counter() - start
+            calls += number
+        return elapsed / calls * 1e6
+    return timed
+
+
+def _best(timers, repeat):
+    """Best time of each timer over `repeat` runs.
+
+    Runs go round all the timers in turn rather than repeating one
+    benchmark back to back, so a slow spell on the machine costs each
+    benchmark one run instead of all of its runs.
+    """
+    best = dict.fromkeys(timers, float('inf'))
+    for _ in range(repeat):
+        for name, timed in timers.items():
+            best[name] = min(best[name], timed())
+    return best
+
+
+def engine_benchmarks(fixtures, number):
+    timers = {}
+    timers['create_grid'] = _timer(lambda: create_grid(WIDTH, HEIGHT), number)
+
+    pieces = []
+    for shape_idx in range(len(Tetromino.SHAPES)):
+        for rotation in range(4):
+            piece = Tetromino(shape_idx, WIDTH)
+            piece.rotation = rotation
+            pieces.append(piece)
+
+    for name, grid in fixtures.items():
+        def probe(grid=grid):
+            # Every piece and rotation at a column sweep on rows near the surface
+            for piece in pieces:
+                for y in (0, HEIGHT // 2, HEIGHT - 3):
+                    piece.y = y
+                    for x in range(-1, WIDTH):
+                        piece.x = x
+                        valid_space(piece, grid)
+        calls = len(pieces) * 3 * (WIDTH + 1)
+        timers[f'valid_space[{name}]'] = _timer(probe, max(10, number // 100), calls)
+        timers[f'check_lost[{name}]'] = _timer(lambda grid=grid: check_lost(grid), number)
+        timers[f'clear_rows[{name}]'] = _copies_timer(lambda b: clear_rows(b, 0), grid, number)
+
+    piece = Tetromino(5, WIDTH)
+
+    def rotate():
+        piece.rotation = piece.rotate()
+    timers['Tetromino.rotate'] = _timer(rotate, number)
+
+    def game_steps():
+        state = GameState(WIDTH, HEIGHT, seed=7)
+        while not state.game_over:
+            state.step()
+        return state
+    ticks = game_steps().ticks
+    timers['GameState.step'] = _timer(game_steps, max(1, number // ticks // 10), ticks)
+    return timers
+
+
+def render_benchmarks(fixtures, number):
+    """Timers for the drawing code; pygame's display must be initialised until they are done"""
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((BLOCK_SIZE * (WIDTH + 6), BLOCK_SIZE * HEIGHT))
+    timers = {}
+    grid = fixtures['half_full']
+    piece = Tetromino(5, WIDTH)
+    gray = (128, 128, 128)
+
+    def full_frame():
+        screen.fill((0, 0, 0))
+        draw_grid(screen, grid, BLOCK_SIZE, Tetromino.COLORS, gray)
+        draw_tetromino(screen, piece, BLOCK_SIZE)
+        draw_score(screen, 1230, BLOCK_SIZE * WIDTH + 10, 20)
+    frames = max(1, number // 20)
+    timers['draw_grid[half_full]'] = _timer(
+        lambda: draw_grid(screen, grid, BLOCK_SIZE, Tetromino.COLORS, gray), frames)
+    timers['draw_tetromino'] = _timer(lambda: draw_tetromino(screen, piece, BLOCK_SIZE), number)
+    timers['draw_score'] = _timer(lambda: draw_score(screen, 1230, BLOCK_SIZE * WIDTH + 10, 20), number)
+    timers['full_frame[half_full]'] = _timer(full_frame, frames)
+
+    state = GameState(WIDTH, HEIGHT, seed=3)
+    state.grid = fixtures['half_full']
+    renderer = Renderer(screen, BLOCK_SIZE, WIDTH, HEIGHT)
+
+    def renderer_full():
+        renderer.invalidate()
+        renderer.draw(state)
+    timers['Renderer.draw[full]'] = _timer(renderer_full, frames)
+
+    def renderer_move():
+        # One-column shift per frame: the usual frame during play
+        state.current_piece.x = 3 if state.current_piece.x == 4 else 4
+        renderer.draw(state)
+    renderer.invalidate()
+    renderer.draw(state)
+    timers['Renderer.draw[move]'] = _timer(renderer_move, frames)
+    return timers
+
+
+def machine():
+    """What the timings were taken on; they only compare on the same machine"""
+    return {
+        'python': platform.python_version(),
+        'pygame': pygame.version.ver,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def run(number=2000, repeat=7, render=True, rounds=3):
+    fixtures = make_fixtures()
+    timers = engine_benchmarks(fixtures, number)
+    if render:
+        timers.update(render_benchmarks(fixtures, number))
+    samples = {}
+    try:
+        for _ in range(rounds):
+            for name, value in _best(timers, repeat).items():
+                samples.setdefault(name, []).append(round(value, 4))
+    finally:
+        if render:
+            pygame.quit()
+    return {
+        'meta': dict(machine(), number=number, repeat=repeat, rounds=rounds),
+        'unit': 'us_per_call',
+        'results': {name: round(statistics.median(values), 4) for name, values in samples.items()},
+        'samples': samples,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Print each benchmark against the baseline and return the names that regressed.
+
+    A benchmark only counts as a regression when every round of `report`
+    is slower than the baseline's median by more than `tolerance`; one slow
+    round is more likely the machine than the code.
+    """
+    current = machine()
+    recorded = {key: baseline.get('meta', {}).get(key) for key in current}
+    if recorded != current:
+        print("Warning: the baseline was recorded on a different machine or setup:")
+        for key, value in recorded.items():
+            if value != current[key]:
+                print(f"  {key}: {value} (now {current[key]})")
+    regressions = []
+    for name, value in report['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:32} {value:12.3f} us   (new)")
+            continue
+        ratio = value / base if base else float('inf')
+        fastest = min(report.get('samples', {}).get(name, [value]))
+        flag = ''
+        if not base or fastest / base > 1 + tolerance:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        print(f"{name:32} {value:12.3f} us   {ratio:6.2f}x baseline{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark engine and renderer hot paths")
+    parser.add_argument('--number', type=int, default=2000, help="calls per timing run")
+    parser.add_argument('--repeat', type=int, default=7, help="timing runs; the best is kept")
+    parser.add_argument('--rounds', type=int, default=3,
+                        help="times the whole suite is run; results are the median round")
+    parser.add_argument('--no-render', action='store_true', help="skip the pygame drawing benchmarks")
+    parser.add_argument('--output', help="write the JSON report to this file")
+    parser.add_argument('--baseline', help="compare against this JSON report")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed slowdown against the baseline (0.25 = 25%%)")
+    parser.add_argument('--save-baseline', metavar='FILE', help="write the report as the new baseline")
+    args = parser.parse_args()
+
+    if args.rounds < 1:
+        parser.error("--rounds must be at least 1")
+    report = run(args.number, args.repeat, render=not args.no_render, rounds=args.rounds)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+                f.write('\n')
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) slower than baseline by more than {args.tolerance:.0%}")
+            sys.exit(1)
+    elif not args.output and not args.save_baseline:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,322 @@
+_MASK64 = (1 << 64) - 1
+
+
+def splitmix64(value):
+    """Well-mixed 64-bit key for an integer; fixed across runs and platforms"""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+_zobrist_tables = {}
+
+
+def zobrist_table(width, height):
+    """Per row, one 256-entry table per byte of the row mask.
+
+    The Zobrist key of a row mask is the XOR of the keys of its set cells;
+    looking it up a byte at a time keeps that to a few table reads.
+    """
+    table = _zobrist_tables.get((width, height))
+    if table is None:
+        table = []
+        for y in range(height):
+            chunks = []
+            for start in range(0, width, 8):
+                keys = [splitmix64(y * width + x) for x in range(start, min(start + 8, width))]
+                chunk = [0] * 256
+                for byte in range(1, 256):
+                    low = byte & -byte
+                    bit = low.bit_length() - 1
+                    chunk[byte] = chunk[byte ^ low] ^ (keys[bit] if bit < len(keys) else 0)
+                chunks.append(chunk)
+            table.append(tuple(chunks))
+        table = _zobrist_tables[(width, height)] = tuple(table)
+    return table
+
+
+def _row_key(chunks, mask):
+    key = 0
+    for chunk in chunks:
+        key ^= chunk[mask & 0xFF]
+        mask >>= 8
+    return key
+
+
+class _RowView:
+    """List-like view of one board row so `grid[y][x]` keeps working"""
+    __slots__ = ('board', 'y')
+
+    def __init__(self, board, y):
+        self.board = board
+        self.y = y
+
+    def __len__(self):
+        return self.board.width
+
+    def __getitem__(self, x):
+        if isinstance(x, slice):
+            return list(self.board.colors[self.y][x])
+        return self.board.colors[self.y][x]
+
+    def __setitem__(self, x, value):
+        if x < 0:
+            x += self.board.width
+        self.board.set_cell(x, self.y, value)
+
+    def __iter__(self):
+        return iter(self.board.colors[self.y])
+
+    def __eq__(self, other):
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return repr(list(self))
+
+
+class Board:
+    """Playing field stored as one bitmask per row plus a color plane.
+
+    Bit `x` of `rows[y]` is set when cell (x, y) is occupied, and
+    `colors[y][x]` holds the color index (shape index + 1, 0 for empty).
+    Indexing a board returns a row view, so code written against the old
+    list-of-lists grid (`grid[y][x]`, `len(grid)`, `len(grid[0])`) still works.
+
+    `heights[x]` (stack height of column x, 0 when empty) and `fill[y]`
+    (occupied cells in row y) are kept up to date on every change, so the
+    landing row of a piece can be found without probing row by row.
+    `hash` is the Zobrist hash of the occupied cells, updated the same way;
+    `keys[y]` is the part of it contributed by row y.
+    """
+    __slots__ = ('width', 'height', 'full_mask', 'rows', 'colors', 'heights', 'fill',
+                 'hash', 'keys', '_zobrist')
+
+    def __init__(self, width=10, height=20):
+        self.width = width
+        self.height = height
+        self.full_mask = (1 << width) - 1
+        self.rows = [0] * height
+        self.colors = [bytearray(width) for _ in range(height)]
+        self.heights = [0] * width
+        self.fill = [0] * height
+        self.hash = 0
+        self.keys = [0] * height
+        self._zobrist = zobrist_table(width, height)
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if y < 0:
+            y += self.height
+        if not 0 <= y < self.height:
+            raise IndexError("board row out of range")
+        return _RowView(self, y)
+
+    def __iter__(self):
+        return (_RowView(self, y) for y in range(self.height))
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.width = self.width
+        board.height = self.height
+        board.full_mask = self.full_mask
+        board.rows = self.rows[:]
+        board.colors = [bytearray(row) for row in self.colors]
+        board.heights = self.heights[:]
+        board.fill = self.fill[:]
+        board.hash = self.hash
+        board.keys = self.keys[:]
+        board._zobrist = self._zobrist
+        return board
+
+    def set_cell(self, x, y, value):
+        """Set a single cell, keeping the bitmask, color plane and indexes in sync"""
+        self.colors[y][x] = value
+        bit = 1 << x
+        was_set = self.rows[y] & bit
+        if value:
+            if not was_set:
+                self.rows[y] |= bit
+                self.fill[y] += 1
+                key = _row_key(self._zobrist[y], bit)
+                self.keys[y] ^= key
+                self.hash ^= key
+                self.heights[x] = max(self.heights[x], self.height - y)
+        elif was_set:
+            self.rows[y] &= ~bit
+            self.fill[y] -= 1
+            key = _row_key(self._zobrist[y], bit)
+            self.keys[y] ^= key
+            self.hash ^= key
+            if self.heights[x] == self.height - y:
+                self._recompute_heights()
+
+    def _recompute_heights(self):
+        heights = [0] * self.width
+        seen = 0
+        for y, row in enumerate(self.rows):
+            new = row & ~seen
+            if new:
+                seen |= new
+                x = 0
+                while new:
+                    if new & 1:
+                        heights[x] = self.height - y
+                    new >>= 1
+                    x += 1
+                if seen == self.full_mask:
+                    break
+        self.heights = heights
+
+    def fits(self, masks, x, y, width):
+        """Check whether piece row masks fit with their top-left corner at (x, y)"""
+        if x < 0 or x + width > self.width or y + len(masks) > self.height:
+            return False
+        rows = self.rows
+        for dy, mask in enumerate(masks):
+            row = y + dy
+            if row >= 0 and rows[row] & (mask << x):
+                return False
+        return True
+
+    def landing_row(self, state, x, y):
+        """Row a piece in rotation `state` comes to rest on when dropped from (x, y).
+
+        When the piece is above the stack in every column it covers this is a
+        max over those columns' heights; only a piece tucked under an
+        overhang falls back to probing downwards.
+        """
+        heights = self.heights
+        limit = self.height
+        for dx, bottom in state.bottoms:
+            row = self.height - heights[x + dx] - 1 - bottom
+            if row < limit:
+                limit = row
+        if limit >= y:
+            return limit
+        while self.fits(state.masks, x, y + 1, state.width):
+            y += 1
+        return y
+
+    def place(self, masks, x, y, value):
+        """Write piece row masks into the board with the given color value"""
+        rows = self.rows
+        colors = self.colors
+        heights = self.heights
+        fill = self.fill
+        zobrist = self._zobrist
+        keys = self.keys
+        for dy, mask in enumerate(masks):
+            row = y + dy
+            if row < 0 or not mask:
+                continue
+            # Only cells not already occupied change the indexes
+            new = (mask << x) & ~rows[row]
+            rows[row] |= new
+            fill[row] += bin(new).count('1')
+            key = _row_key(zobrist[row], new)
+            keys[row] ^= key
+            self.hash ^= key
+            line = colors[row]
+            height = self.height - row
+            bit = 0
+            while mask:
+                if mask & 1:
+                    line[x + bit] = value
+                    if heights[x + bit] < height:
+                        heights[x + bit] = height
+                mask >>= 1
+                bit += 1
+
+    def clear_full_rows(self):
+        """Remove completed rows, shift the rest down and return how many were cleared"""
+        width = self.width
+        fill = self.fill
+        if width not in fill:
+            return 0
+        rows = self.rows
+        colors = self.colors
+        keys = self.keys
+        zobrist = self._zobrist
+        key = self.hash
+        # Walk up from the bottom, moving each kept row down over the cleared
+        # ones. Cleared rows drop out of the hash with their keys and only rows
+        # that moved are keyed again, so rows below the lowest clear cost nothing.
+        new_y = self.height - 1
+        for y in range(new_y, -1, -1):
+            count = fill[y]
+            if count == width:
+                key ^= keys[y]
+                continue
+            if new_y != y:
+                row = rows[y]
+                rows[new_y] = row
+                colors[new_y] = colors[y]
+                fill[new_y] = count
+                if row:
+                    moved = _row_key(zobrist[new_y], row)
+                    key ^= keys[y] ^ moved
+                    keys[new_y] = moved
+                else:
+                    keys[new_y] = 0
+            new_y -= 1
+        cleared = new_y + 1
+        for y in range(cleared):
+            rows[y] = 0
+            colors[y] = bytearray(width)
+            fill[y] = 0
+            keys[y] = 0
+        self.hash = key
+        self._recompute_heights()
+        return cleared
+
+    def add_garbage(self, count, hole, value):
+        """Push the stack up by `count` rows, filling the bottom with rows open only at column `hole`.
+
+        Returns True if occupied rows were pushed off the top.
+        """
+        count = min(count, self.height)
+        overflow = any(self.rows[:count])
+        line = bytearray([value]) * self.width
+        line[hole] = 0
+        self.rows = self.rows[count:] + [self.full_mask & ~(1 << hole)] * count
+        self.colors = self.colors[count:] + [bytearray(line) for _ in range(count)]
+        self.reindex()
+        return overflow
+
+    def reindex(self):
+        """Rebuild fill counts, heights, row keys and hash after `rows` and `colors` were written directly"""
+        self.fill = [bin(row).count('1') for row in self.rows]
+        self._recompute_heights()
+        self.keys = [_row_key(chunks, row) if row else 0 for chunks, row in zip(self._zobrist, self.rows)]
+        key = 0
+        for row_key in self.keys:
+            key ^= row_key
+        self.hash = key
+
+    def compute_hash(self):
+        """Zobrist hash of the occupied cells, computed from scratch"""
+        key = 0
+        for chunks, row in zip(self._zobrist, self.rows):
+            if row:
+                key ^= _row_key(chunks, row)
+        return key
+
+
+def create_grid(width, height):
+    return Board(width, height)
+
+
+def valid_space(tetromino, grid):
+    state = tetromino.state
+    return grid.fits(state.masks, tetromino.x, tetromino.y, state.width)
+
+
+def check_lost(grid):
+    return grid.rows[0] != 0
+
+
+def clear_rows(grid, score):
+    return score + grid.clear_full_rows() * 10
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+"""Versus client for server.py.
+
+Key presses are sent to the server as inputs; the boards on screen are
+copies kept up to date from the changes the server streams back, so there
+is no second simulation on the client to drift out of step. Your board is
+drawn with the game renderer, the opponents' boards on a spectator wall.
+
+    python server.py
+    python client.py --name Ann --room finals
+    python client.py --name Bob --room finals
+"""
+import argparse
+import os
+import socket
+
+import pygame
+
+import net
+from game import STEP_TIME
+from lib import draw_text_middle, render_text
+from renderer import Renderer
+from spectator import SpectatorWall
+from tetromino import Tetromino
+from controls import InputHandler, KEY_ACTIONS, MAX_FRAME_TIME
+from ai import AutoPlayer
+
+BLOCK_SIZE = 30
+OPPONENTS_WIDTH = 480  # pixels to the right of your board for the other players' boards
+GARBAGE_COLOR = (110, 110, 110)
+COLORS = Tetromino.COLORS + [GARBAGE_COLOR]  # garbage cells have value game.GARBAGE
+AUTOPLAY_INTERVAL = 4
+FPS = 60
+
+
+class Connection:
+    """Non-blocking TCP connection that the frame loop polls"""
+
+    def __init__(self, host, port, timeout=5):
+        self.sock = socket.create_connection((host, port), timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.reader = net.MessageReader()
+        self.outgoing = bytearray()
+        self.closed = False
+
+    def send(self, data):
+        self.outgoing += data
+        self.flush()
+
+    def flush(self):
+        while self.outgoing and not self.closed:
+            try:
+                sent = self.sock.send(self.outgoing)
+            except BlockingIOError:
+                return
+            except OSError:
+                self.closed = True
+                return
+            del self.outgoing[:sent]
+
+    def receive(self):
+        """Messages that arrived since the last call"""
+        messages = []
+        while not self.closed:
+            try:
+                data = self.sock.recv(65536)
+            except BlockingIOError:
+                break
+            except OSError:
+                data = b''
+            if not data:
+                self.closed = True
+                break
+            messages += self.reader.feed(data)
+        return messages
+
+    def close(self):
+        self.sock.close()
+
+
+class Match:
+    """The boards of one versus game, drawn from the RemoteGames the server updates"""
+
+    def __init__(self, screen, width, height, index, names):
+        self.games = [net.RemoteGame(width, height, name) for name in names]
+        self.me = self.games[index]
+        self.opponents = [game for i, game in enumerate(self.games) if i != index]
+        self.labels = [f"{game.name}: " for game in self.opponents]
+        area = pygame.Rect(0, 0, BLOCK_SIZE * (width + 6), BLOCK_SIZE * height)
+        self.renderer = Renderer(screen.subsurface(area), BLOCK_SIZE, width, height, colors=COLORS)
+        self.wall = None
+        if self.opponents:
+            wall_area = pygame.Rect(area.right, 0, screen.get_width() - area.right, area.height)
+            self.wall = SpectatorWall(screen.subsurface(wall_area), len(self.opponents),
+                                      width, height, colors=COLORS)
+            self.wall_offset = wall_area.topleft
+        panel = self.renderer.panel
+        self.status_area = pygame.Rect(panel.x + 10, 220, panel.width - 10, panel.height - 220)
+        self.status = None
+        self.ranking = None
+        self.message = None
+
+    def status_lines(self):
+        me = self.me
+        lines = [f"Lines: {me.lines}"]
+        if me.garbage:
+            lines.append(f"Incoming: {me.garbage}")
+        if self.ranking is not None:
+            place = self.ranking.index(self.games.index(me)) + 1
+            lines += ["You won!" if place == 1 else f"Place {place} of {len(self.games)}",
+                      "Enter: play again"]
+        elif me.game_over:
+            lines.append("Topped out")
+        if self.message:
+            lines.append(self.message)
+        return lines
+
+    def draw(self, surface):
+        dirty = self.renderer.draw(self.me)
+        status = self.status_lines()
+        # The renderer clears the whole panel when it redraws it
+        if status != self.status or self.renderer.panel in dirty:
+            self.status = status
+            surface.fill((0, 0, 0), self.status_area)
+            for i, line in enumerate(status):
+                surface.blit(render_text(line, 24), (self.status_area.x, self.status_area.y + i * 28))
+            dirty.append(self.status_area.copy())
+        if self.wall:
+            dirty += [rect.move(self.wall_offset) for rect in self.wall.draw(self.opponents, self.labels)]
+        return dirty
+
+
+def play(conn, screen, clock, autoplay=None, controls=None):
+    """Run one match over `conn` until it ends; returns True if the player asked to play again"""
+    controls = controls or InputHandler()
+    match = None
+    waiting = "Connecting..."
+    problem = None
+    shown = None
+    accumulator = 0.0
+
+    while True:
+        accumulator += min(clock.tick(FPS) / 1000, MAX_FRAME_TIME)
+        finished = conn.closed or (match is not None and match.ranking is not None)
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+            if event.type == pygame.WINDOWFOCUSLOST:
+                controls.clear()
+            elif event.type == pygame.KEYUP:
+                if event.key in KEY_ACTIONS:
+                    controls.release(KEY_ACTIONS[event.key])
+            elif event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    return False
+                if finished and event.key == pygame.K_RETURN:
+                    return True
+                if autoplay and event.key == pygame.K_a:
+                    autoplay.toggle()
+                elif event.key in KEY_ACTIONS:
+                    controls.press(KEY_ACTIONS[event.key])
+
+        try:
+            for kind, payload in conn.receive():
+                if kind == net.LOBBY:
+                    waiting = f"Waiting for players {payload[0]}/{payload[1]}"
+                elif kind == net.START:
+                    width, height, index, names = net.parse_start(payload)
+                    others = OPPONENTS_WIDTH if len(names) > 1 else 0
+                    screen = pygame.display.set_mode((BLOCK_SIZE * (width + 6) + others, BLOCK_SIZE * height))
+                    match = Match(screen, width, height, index, names)
+                elif kind == net.FRAME and match is not None:
+                    net.apply_frame(match.games, payload)
+                elif kind == net.END and match is not None:
+                    match.ranking = net.parse_end(payload)
+                elif kind == net.ERROR:
+                    problem = net.unpack_str(payload, 0)[0]
+                    conn.closed = True
+        except (net.ProtocolError, IndexError, ValueError) as e:
+            problem = f"Bad data from server: {e or 'truncated message'}"
+            conn.closed = True
+        if conn.closed and problem is None and (match is None or match.ranking is None):
+            problem = "Disconnected"
+
+        # Inputs are sampled in fixed steps, like a local game, and sent as they happen
+        playing = (match is not None and match.ranking is None and not match.me.game_over
+                   and not conn.closed)
+        while accumulator >= STEP_TIME:
+            accumulator -= STEP_TIME
+            if not playing:
+                continue
+            if autoplay and autoplay.enabled:
+                actions = list(autoplay(match.me))
+                controls.actions()  # keep held-key timing running underneath
+            else:
+                actions = controls.actions()
+            if actions:
+                conn.send(net.inputs(actions))
+
+        if match is None:
+            text = problem or waiting
+            if text != shown:
+                shown = text
+                screen.fill((0, 0, 0))
+                draw_text_middle(screen, text, 30, (255, 255, 255))
+                pygame.display.flip()
+            continue
+        match.message = problem
+        dirty = match.draw(screen)
+        if dirty:
+            pygame.display.update(dirty)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tetris versus client")
+    parser.add_argument('--host', default='127.0.0.1', help="server address")
+    parser.add_argument('--port', type=int, default=net.PORT, help="server port")
+    parser.add_argument('--name', default=os.environ.get('USER', ''), help="your name on the other screens")
+    parser.add_argument('--room', default='lobby', help="room to join; players in the same room play each other")
+    parser.add_argument('--players', type=int, default=0,
+                        help="players the room waits for if you are the first to join (default: server's)")
+    parser.add_argument('--autoplay', action='store_true', help="let the computer play (press A to toggle)")
+    args = parser.parse_args()
+    if not 0 <= args.players <= 255:
+        parser.error("--players must be between 0 and 255")
+
+    pygame.display.init()
+    pygame.font.init()
+    screen = pygame.display.set_mode((BLOCK_SIZE * 16, BLOCK_SIZE * 20))
+    pygame.display.set_caption(f"Tetris - Versus ({args.room})")
+    clock = pygame.time.Clock()
+    try:
+        again = True
+        while again:
+            try:
+                conn = Connection(args.host, args.port)
+            except OSError as e:
+                raise SystemExit(f"Cannot connect to {args.host}:{args.port}: {e}")
+            conn.send(net.hello(args.name, args.room, args.players))
+            autoplay = AutoPlayer(interval=AUTOPLAY_INTERVAL, enabled=args.autoplay)
+            try:
+                again = play(conn, screen, clock, autoplay, InputHandler())
+            finally:
+                conn.close()
+            screen = pygame.display.set_mode((BLOCK_SIZE * 16, BLOCK_SIZE * 20))
+    finally:
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
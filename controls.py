@@ -0,0 +1,84 @@
+"""Keyboard controls for the falling piece, shared by tetris.py and client.py.
+
+The front end looks keys up in KEY_ACTIONS and reports presses and releases
+as actions; `InputHandler.actions()` is called once per fixed step and
+returns what to pass to GameState.step. All timing is counted in steps, so
+it is the same at any frame rate and what reaches the game can be recorded
+in a replay like any other input.
+"""
+import pygame
+
+from game import MOVE_LEFT, MOVE_RIGHT, MOVE_DOWN, ROTATE, HARD_DROP
+
+KEY_ACTIONS = {
+    pygame.K_LEFT: MOVE_LEFT,
+    pygame.K_RIGHT: MOVE_RIGHT,
+    pygame.K_DOWN: MOVE_DOWN,
+    pygame.K_UP: ROTATE,
+    pygame.K_SPACE: HARD_DROP,
+}
+
+MAX_FRAME_TIME = 0.25  # seconds; after a longer stall the game slows down instead of jumping ahead
+
+# Defaults in 1/60 s steps
+DAS = 10  # delayed auto shift: steps a sideways key is held before it repeats
+ARR = 2  # auto repeat rate: steps between repeated sideways moves
+SOFT_DROP = 2  # steps between rows while down is held
+
+
+class InputHandler:
+    """Turns key presses into per-step actions with auto-repeat for held keys.
+
+    Sideways moves repeat every `arr` steps once held for `das` steps; when
+    both directions are held the one pressed last wins. Down repeats every
+    `soft_drop` steps straight away. Other actions happen once per press.
+    """
+
+    def __init__(self, das=DAS, arr=ARR, soft_drop=SOFT_DROP):
+        if arr < 1 or soft_drop < 1:
+            raise ValueError("arr and soft_drop must be at least one step")
+        self.das = das
+        self.arr = arr
+        self.soft_drop = soft_drop
+        self._pressed = []
+        self._held = {}  # action -> steps held
+        self._shift = None  # sideways action currently allowed to repeat
+
+    def press(self, action):
+        self._pressed.append(action)
+        if action in (MOVE_LEFT, MOVE_RIGHT):
+            self._held[action] = 0
+            self._shift = action
+        elif action == MOVE_DOWN:
+            self._held[action] = 0
+
+    def release(self, action):
+        if self._held.pop(action, None) is None:
+            return
+        if action == self._shift:
+            # Fall back to the other direction if it is still held
+            other = MOVE_RIGHT if action == MOVE_LEFT else MOVE_LEFT
+            self._shift = other if other in self._held else None
+            if self._shift:
+                self._held[other] = 0
+
+    def clear(self):
+        """Forget held keys, e.g. when the window loses focus and key-ups go missing"""
+        self._held.clear()
+        self._shift = None
+
+    def actions(self):
+        """Actions for the next step: new presses first, then repeats of held keys"""
+        actions = self._pressed
+        self._pressed = []
+        held = self._held
+        for action in held:
+            held[action] += 1
+        shift = self._shift
+        if shift is not None:
+            steps = held[shift] - self.das
+            if steps >= 0 and steps % self.arr == 0:
+                actions.append(shift)
+        if MOVE_DOWN in held and held[MOVE_DOWN] % self.soft_drop == 0:
+            actions.append(MOVE_DOWN)
+        return actions
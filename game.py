@@ -0,0 +1,214 @@
+"""Headless game rules. This module must never import pygame."""
+from tetromino import Tetromino
+from board import create_grid, valid_space, check_lost
+from randomizer import make_randomizer
+
+# Actions accepted by GameState.step
+MOVE_LEFT = 'left'
+MOVE_RIGHT = 'right'
+MOVE_DOWN = 'down'
+ROTATE = 'rotate'
+HARD_DROP = 'hard_drop'
+# Replays store actions by position here, so new actions must only be appended
+ACTIONS = (MOVE_LEFT, MOVE_RIGHT, MOVE_DOWN, ROTATE, HARD_DROP)
+
+STEP_TIME = 1 / 60  # seconds simulated per step
+LOCK_RESETS = 15  # moves that may restart the lock delay of one resting piece
+GARBAGE = 8  # cell value of garbage rows, one past the piece colors
+
+
+class GameState:
+    """Complete state of one game, advanced in fixed time steps.
+
+    The pygame front end in tetris.py turns key presses into actions and
+    calls `step`; simulations can do the same without a window or clock.
+    """
+
+    def __init__(self, width=10, height=20, seed=None, fall_speed=0.5, step_time=STEP_TIME,
+                 randomizer='uniform', lock_delay=0.5):
+        self.width = width
+        self.height = height
+        self.fall_speed = fall_speed
+        self.step_time = step_time
+        self.seed = seed
+        self.randomizer = make_randomizer(randomizer, seed)
+        self.grid = create_grid(width, height)
+        self.current_piece = self._new_piece()
+        self.next_piece = self._new_piece()
+        self.score = 0
+        self.lines = 0
+        self.pieces = 0
+        self.ticks = 0
+        # Gravity is counted in whole steps so runs are exactly reproducible
+        self.fall_ticks = 0
+        self.gravity_ticks = max(1, round(fall_speed / step_time))
+        # A piece that cannot fall further locks after resting this many steps;
+        # a successful move or rotation restarts the count up to LOCK_RESETS times
+        self.lock_delay_ticks = max(1, round(lock_delay / step_time))
+        self.lock_ticks = 0
+        self.lock_resets = 0
+        self._resting = None  # cached resting(); cleared whenever the piece moves
+        # Garbage waiting to rise from the bottom, as (lines, hole column) pairs
+        self.garbage = []
+        self.game_over = False
+        # Optional FrameProfiler; step() laps its 'gravity' and 'lock' phases
+        self.profiler = None
+
+    def _new_piece(self):
+        return Tetromino(self.randomizer.next(), grid_width=self.width)
+
+    def preview(self, count):
+        """Shape indices of the next `count` pieces, starting with `next_piece`"""
+        if count <= 0:
+            return []
+        return [self.next_piece.shape_idx] + self.randomizer.peek(count - 1)
+
+    def _moved(self):
+        self._resting = None
+        if self.lock_ticks and self.lock_resets < LOCK_RESETS:
+            self.lock_ticks = 0
+            self.lock_resets += 1
+
+    def _try_move(self, dx, dy):
+        piece = self.current_piece
+        piece.x += dx
+        piece.y += dy
+        if valid_space(piece, self.grid):
+            self._moved()
+            return True
+        piece.x -= dx
+        piece.y -= dy
+        return False
+
+    def _try_rotate(self):
+        piece = self.current_piece
+        old_rotation = piece.rotation
+        piece.rotation = piece.rotate()
+        if valid_space(piece, self.grid):
+            self._moved()
+            return True
+        piece.rotation = old_rotation
+        return False
+
+    def resting(self):
+        """True when the falling piece cannot move down any further"""
+        piece = self.current_piece
+        state = piece.state
+        return not self.grid.fits(state.masks, piece.x, piece.y + 1, state.width)
+
+    def apply(self, action):
+        """Apply one player action to the falling piece"""
+        if action == MOVE_LEFT:
+            return self._try_move(-1, 0)
+        if action == MOVE_RIGHT:
+            return self._try_move(1, 0)
+        if action == MOVE_DOWN:
+            return self._try_move(0, 1)
+        if action == ROTATE:
+            return self._try_rotate()
+        if action == HARD_DROP:
+            self.hard_drop()
+            return True
+        raise ValueError(f"Unknown action: {action!r}")
+
+    def ghost_row(self):
+        """Row the falling piece would land on if dropped now"""
+        piece = self.current_piece
+        return self.grid.landing_row(piece.state, piece.x, piece.y)
+
+    def hard_drop(self):
+        """Drop the falling piece straight to its landing row and lock it"""
+        self.current_piece.y = self.ghost_row()
+        return self.lock_piece()
+
+    def pending_garbage(self):
+        return sum(lines for lines, hole in self.garbage)
+
+    def queue_garbage(self, lines, hole):
+        """Queue `lines` garbage rows with an empty cell in column `hole`.
+
+        They rise from the bottom when the next piece locks without
+        clearing a row.
+        """
+        if lines > 0:
+            self.garbage.append((lines, hole))
+
+    def cancel_garbage(self, lines):
+        """Cancel up to `lines` queued garbage rows, oldest first; returns how many were left over"""
+        while lines and self.garbage:
+            queued, hole = self.garbage[0]
+            if queued > lines:
+                self.garbage[0] = (queued - lines, hole)
+                return 0
+            lines -= queued
+            del self.garbage[0]
+        return lines
+
+    def lock_piece(self):
+        """Write the falling piece into the grid, clear rows and spawn the next piece"""
+        piece = self.current_piece
+        self.grid.place(piece.masks, piece.x, piece.y, piece.shape_idx + 1)
+        cleared = self.grid.clear_full_rows()
+        self.lines += cleared
+        self.score += cleared * 10
+        overflow = False
+        if self.garbage and not cleared:
+            for lines, hole in self.garbage:
+                overflow = self.grid.add_garbage(lines, hole, GARBAGE) or overflow
+            self.garbage = []
+        self.pieces += 1
+        self.current_piece = self.next_piece
+        self.next_piece = self._new_piece()
+        self.fall_ticks = 0
+        self.lock_ticks = 0
+        self.lock_resets = 0
+        self._resting = None
+        if overflow or check_lost(self.grid):
+            self.game_over = True
+        return cleared
+
+    def step(self, actions=()):
+        """Advance the game by one fixed time step and return the number of rows cleared.
+
+        Inputs are applied first, then gravity, then the lock delay of a
+        resting piece, so a move made on the step a piece lands still counts.
+        """
+        if self.game_over:
+            return 0
+        lines = self.lines
+        self.ticks += 1
+        profiler = self.profiler
+
+        if actions:
+            pieces = self.pieces
+            for action in actions:
+                if self.game_over:
+                    break
+                before = self.pieces
+                self.apply(action)
+                if profiler is not None:
+                    # Moves are timed with gravity, an input that locked the piece as a lock
+                    profiler.lap('lock' if self.pieces != before else 'gravity')
+            if self.game_over or self.pieces != pieces:
+                # A hard drop already locked this step's piece
+                return self.lines - lines
+
+        # Piece falling
+        self.fall_ticks += 1
+        if self.fall_ticks >= self.gravity_ticks:
+            self.fall_ticks = 0
+            self._try_move(0, 1)
+        if profiler is not None:
+            profiler.lap('gravity')
+
+        if self._resting is None:
+            self._resting = self.resting()
+        if self._resting:
+            self.lock_ticks += 1
+            if self.lock_ticks >= self.lock_delay_ticks:
+                self.lock_piece()
+                if profiler is not None:
+                    profiler.lap('lock')
+        else:
+            self.lock_ticks = 0
+        return self.lines - lines
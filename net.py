@@ -0,0 +1,336 @@
+"""Wire protocol of the versus mode, shared by server.py and client.py. Does not import pygame.
+
+Every message is a u16 length followed by that many bytes, the first of
+which is the message type (all integers little endian):
+
+    client -> server
+    HELLO   protocol version (u8), players wanted (u8, 0 = server default),
+            name (str8), room (str8)
+    INPUT   action codes (u8 each, see game.ACTIONS) for the next step
+
+    server -> client
+    LOBBY   players joined (u8), players needed (u8)
+    START   width (u8), height (u8), your index (u8), player count (u8),
+            then each player's name (str8)
+    FRAME   tick (u32), board count (u8), then per changed board:
+            index (u8), flags (u8) and the fields the flags name, in flag order
+    END     player count (u8), then player indexes from winner to first out
+    ERROR   message (str8)
+
+A str8 is a u8 byte count followed by UTF-8 text. Clients only ever send
+inputs; the server runs every game and each FRAME carries only what changed
+since the previous one: the rows a lock, line clear or garbage rewrote
+(row index plus two cells per byte), and the falling piece when it moved,
+rotated or was replaced.
+"""
+import struct
+
+from tetromino import Tetromino
+from board import Board
+from game import ACTIONS
+
+PORT = 7777
+PROTOCOL_VERSION = 2
+MAX_MESSAGE = 0xFFFF
+MAX_NAME = 16  # bytes of a player or room name
+
+HELLO = 1
+INPUT = 2
+LOBBY = 16
+START = 17
+FRAME = 18
+END = 19
+ERROR = 20
+
+# FRAME field flags, in the order their fields follow
+ROWS = 0x01  # a piece locked: row count (u8), then per row its index (u8) and packed cells
+PIECE = 0x02  # falling piece: shape, rotation (u8), x, y (i8)
+NEXT = 0x04  # next piece: shape (u8)
+SCORE = 0x08  # score (u32), lines (u32)
+GARBAGE = 0x10  # garbage rows waiting to rise (u8)
+OVER = 0x20  # game over, no field
+
+_LENGTH = struct.Struct('<H')
+_PIECE = struct.Struct('<BBbb')
+_SCORE = struct.Struct('<II')
+_TICK = struct.Struct('<I')
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def message(kind, payload=b''):
+    """Frame one message for the wire"""
+    if len(payload) + 1 > MAX_MESSAGE:
+        raise ProtocolError("Message too long")
+    return _LENGTH.pack(len(payload) + 1) + bytes((kind,)) + payload
+
+
+def pack_str(text, limit=MAX_NAME):
+    data = text.encode('utf-8')[:min(limit, 0xFF)]
+    # Cutting a multi-byte character in half leaves bytes that are dropped on decoding
+    return bytes((len(data),)) + data
+
+
+def unpack_str(data, pos):
+    if pos >= len(data) or pos + 1 + data[pos] > len(data):
+        raise ProtocolError("Truncated string")
+    end = pos + 1 + data[pos]
+    return data[pos + 1:end].decode('utf-8', 'ignore'), end
+
+
+class MessageReader:
+    """Splits a byte stream into (type, payload) messages"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        self.buffer += data
+        messages = []
+        buffer = self.buffer
+        pos = 0
+        while len(buffer) - pos >= 2:
+            length, = _LENGTH.unpack_from(buffer, pos)
+            if not length:
+                raise ProtocolError("Empty message")
+            if len(buffer) - pos - 2 < length:
+                break
+            body = bytes(buffer[pos + 2:pos + 2 + length])
+            messages.append((body[0], body[1:]))
+            pos += 2 + length
+        del buffer[:pos]
+        return messages
+
+
+def hello(name, room, players=0):
+    return message(HELLO, bytes((PROTOCOL_VERSION, players)) + pack_str(name) + pack_str(room))
+
+
+def parse_hello(payload):
+    """(name, room, players wanted) from a HELLO payload"""
+    if len(payload) < 2:
+        raise ProtocolError("Truncated hello")
+    if payload[0] != PROTOCOL_VERSION:
+        raise ProtocolError(f"Unsupported protocol version {payload[0]}")
+    name, pos = unpack_str(payload, 2)
+    room, pos = unpack_str(payload, pos)
+    return name, room, payload[1]
+
+
+def inputs(actions):
+    return message(INPUT, bytes(ACTIONS.index(action) for action in actions))
+
+
+def parse_inputs(payload):
+    try:
+        return [ACTIONS[code] for code in payload]
+    except IndexError:
+        raise ProtocolError("Unknown action code") from None
+
+
+def start(width, height, index, names):
+    payload = bytes((width, height, index, len(names))) + b''.join(pack_str(name) for name in names)
+    return message(START, payload)
+
+
+def parse_start(payload):
+    """(width, height, your index, names) from a START payload"""
+    if len(payload) < 4:
+        raise ProtocolError("Truncated start")
+    width, height, index, count = payload[:4]
+    names = []
+    pos = 4
+    for _ in range(count):
+        name, pos = unpack_str(payload, pos)
+        names.append(name)
+    return width, height, index, names
+
+
+def pack_row(line):
+    """Color values of one row, two cells per byte"""
+    packed = bytearray((len(line) + 1) // 2)
+    for x, value in enumerate(line):
+        packed[x >> 1] |= value << (4 * (x & 1))
+    return packed
+
+
+class BoardTracker:
+    """What the clients were last sent about one game.
+
+    `delta(state)` returns the FRAME fields for everything that changed
+    since the previous call, or b'' when nothing did. The board only changes
+    when a piece locks, so its rows are compared on those steps only.
+    """
+
+    def __init__(self, width, height):
+        # Clients start from an empty board, as does every game
+        self.rows = [bytes(width)] * height
+        self.pieces = 0
+        self.piece = None
+        self.next = None
+        self.score = None
+        self.garbage = 0
+        self.over = False
+
+    def delta(self, state):
+        flags = 0
+        out = bytearray()
+        if state.pieces != self.pieces:
+            self.pieces = state.pieces
+            changed = []
+            for y, line in enumerate(state.grid.colors):
+                if line != self.rows[y]:
+                    self.rows[y] = bytes(line)
+                    changed.append(bytes((y,)) + pack_row(line))
+            # A lock always marks the board, even if no row ended up different
+            flags |= ROWS
+            out.append(len(changed))
+            out += b''.join(changed)
+        piece = state.current_piece
+        key = (piece.shape_idx, piece.rotation, piece.x, piece.y)
+        if key != self.piece:
+            self.piece = key
+            flags |= PIECE
+            out += _PIECE.pack(*key)
+        if state.next_piece.shape_idx != self.next:
+            self.next = state.next_piece.shape_idx
+            flags |= NEXT
+            out.append(self.next)
+        score = (state.score, state.lines)
+        if score != self.score:
+            self.score = score
+            flags |= SCORE
+            out += _SCORE.pack(*score)
+        garbage = min(state.pending_garbage(), 0xFF)
+        if garbage != self.garbage:
+            self.garbage = garbage
+            flags |= GARBAGE
+            out.append(garbage)
+        if state.game_over and not self.over:
+            self.over = True
+            flags |= OVER
+        if not flags:
+            return b''
+        return bytes((flags,)) + out
+
+
+def frame(tick, deltas):
+    """FRAME message from (index, delta) pairs, skipping empty deltas; None if nothing changed"""
+    parts = [bytes((index,)) + delta for index, delta in deltas if delta]
+    if not parts:
+        return None
+    return message(FRAME, _TICK.pack(tick) + bytes((len(parts),)) + b''.join(parts))
+
+
+class RemoteGame:
+    """Client-side copy of one player's game, rebuilt from FRAME fields.
+
+    It has the attributes and methods Renderer, the spectator wall and the
+    autoplay planner read from a GameState, but no rules of its own.
+    """
+
+    def __init__(self, width, height, name=""):
+        self.width = width
+        self.height = height
+        self.name = name
+        self.grid = Board(width, height)
+        self.current_piece = Tetromino(0, grid_width=width)
+        self.next_piece = Tetromino(0, grid_width=width)
+        self.score = 0
+        self.lines = 0
+        self.pieces = 0
+        self.garbage = 0
+        self.game_over = False
+
+    def ghost_row(self):
+        piece = self.current_piece
+        return self.grid.landing_row(piece.state, piece.x, piece.y)
+
+    def preview(self, count):
+        return [self.next_piece.shape_idx][:count]
+
+    def pending_garbage(self):
+        return self.garbage
+
+    def apply(self, data, pos):
+        """Apply one board's fields starting at `data[pos]` (the flags byte); returns the position after them"""
+        flags = data[pos]
+        pos += 1
+        if flags & ROWS:
+            grid = self.grid
+            width = self.width
+            count = data[pos]
+            pos += 1
+            size = (width + 1) // 2
+            for _ in range(count):
+                y = data[pos]
+                if y >= self.height:
+                    raise ProtocolError("Row out of range")
+                packed = data[pos + 1:pos + 1 + size]
+                if len(packed) < size:
+                    raise ProtocolError("Truncated row")
+                line = grid.colors[y]
+                mask = 0
+                for x in range(width):
+                    value = packed[x >> 1] >> (4 * (x & 1)) & 0xF
+                    line[x] = value
+                    if value:
+                        mask |= 1 << x
+                grid.rows[y] = mask
+                pos += 1 + size
+            grid.reindex()
+            self.pieces += 1
+        if flags & PIECE:
+            shape, rotation, x, y = _PIECE.unpack_from(data, pos)
+            pos += _PIECE.size
+            if shape >= len(Tetromino.SHAPES) or rotation >= 4:
+                raise ProtocolError("Invalid piece")
+            piece = self.current_piece
+            if flags & ROWS or shape != piece.shape_idx:
+                # A new piece, so anything planning moves for the old one starts over
+                piece = self.current_piece = Tetromino(shape, grid_width=self.width)
+            piece.rotation, piece.x, piece.y = rotation, x, y
+        if flags & NEXT:
+            self.next_piece = Tetromino(data[pos], grid_width=self.width)
+            pos += 1
+        if flags & SCORE:
+            self.score, self.lines = _SCORE.unpack_from(data, pos)
+            pos += _SCORE.size
+        if flags & GARBAGE:
+            self.garbage = data[pos]
+            pos += 1
+        if flags & OVER:
+            self.game_over = True
+        return pos
+
+
+def apply_frame(games, payload):
+    """Apply a FRAME payload to the RemoteGames it covers; returns its tick"""
+    try:
+        tick, = _TICK.unpack_from(payload)
+        count = payload[_TICK.size]
+        pos = _TICK.size + 1
+        for _ in range(count):
+            index = payload[pos]
+            if index >= len(games):
+                raise ProtocolError("Board index out of range")
+            pos = games[index].apply(payload, pos + 1)
+    except (struct.error, IndexError):
+        raise ProtocolError("Truncated frame") from None
+    return tick
+
+
+def end(ranking):
+    return message(END, bytes((len(ranking),)) + bytes(ranking))
+
+
+def parse_end(payload):
+    if not payload or len(payload) < 1 + payload[0]:
+        raise ProtocolError("Truncated end")
+    return list(payload[1:1 + payload[0]])
+
+
+def error(text):
+    return message(ERROR, pack_str(text, 0xFF))
@@ -0,0 +1,106 @@
+"""Opt-in per-frame phase timing with rolling percentiles. Does not import pygame."""
+import json
+import os
+import time
+
+PHASES = ('events', 'gravity', 'lock', 'render', 'flip')
+
+
+class RingBuffer:
+    """Fixed-size buffer of the most recent samples"""
+    __slots__ = ('size', 'values', 'index', 'count')
+
+    def __init__(self, size):
+        self.size = size
+        self.values = [0.0] * size
+        self.index = 0
+        self.count = 0
+
+    def push(self, value):
+        self.values[self.index] = value
+        self.index = (self.index + 1) % self.size
+        if self.count < self.size:
+            self.count += 1
+
+    def percentiles(self, points):
+        """Nearest-rank percentiles of the stored samples, e.g. points=(50, 95, 99)"""
+        if not self.count:
+            return [0.0 for _ in points]
+        ordered = sorted(self.values[:self.count])
+        last = self.count - 1
+        return [ordered[min(last, int(round(p / 100 * last)))] for p in points]
+
+
+class FrameProfiler:
+    """Times each phase of a frame and keeps the last `window` frames per phase.
+
+    Call `begin_frame()` once per frame, `lap(phase)` after each phase and
+    `end_frame()` at the end. A phase may be lapped several times in one frame
+    (gravity and lock run once per fixed step); the times are summed.
+    With `log_path` every frame is also appended to a CSV or JSONL file,
+    chosen by the file extension.
+    """
+
+    def __init__(self, window=600, log_path=None, phases=PHASES):
+        self.phases = phases
+        self.buffers = {name: RingBuffer(window) for name in phases + ('frame',)}
+        self.frames = 0
+        self.overlay = False
+        self._current = dict.fromkeys(phases, 0.0)
+        self._frame_start = None
+        self._mark = None
+        self._log = None
+        self._jsonl = False
+        if log_path:
+            self._open_log(log_path)
+
+    def _open_log(self, path):
+        self._jsonl = path.endswith('.jsonl')
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._log = open(path, 'a', buffering=1 << 16)
+        if new and not self._jsonl:
+            self._log.write(','.join(('frame', 'time') + self.phases + ('frame_ms',)) + '\n')
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            # Wall time between frames, including any frame-cap sleep
+            self.buffers['frame'].push((now - self._frame_start) * 1000)
+        self._frame_start = now
+        self._mark = now
+
+    def lap(self, phase):
+        now = time.perf_counter()
+        self._current[phase] += now - self._mark
+        self._mark = now
+
+    def end_frame(self):
+        current = self._current
+        for name in self.phases:
+            self.buffers[name].push(current[name] * 1000)
+        self.frames += 1
+        if self._log is not None:
+            self._write_row()
+        for name in self.phases:
+            current[name] = 0.0
+
+    def _write_row(self):
+        ms = [round(self._current[name] * 1000, 4) for name in self.phases]
+        frame = self.buffers['frame']
+        frame_ms = round(frame.values[frame.index - 1], 4) if frame.count else 0.0
+        if self._jsonl:
+            record = {'frame': self.frames, 'time': round(self._frame_start, 6)}
+            record.update(zip(self.phases, ms))
+            record['frame_ms'] = frame_ms
+            self._log.write(json.dumps(record) + '\n')
+        else:
+            self._log.write(','.join(map(str, [self.frames, round(self._frame_start, 6)] + ms + [frame_ms])) + '\n')
+
+    def stats(self, points=(50, 95, 99)):
+        """Map of phase -> [p50, p95, p99] in milliseconds"""
+        return {name: buffer.percentiles(points) for name, buffer in self.buffers.items()}
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
@@ -0,0 +1,110 @@
+"""Seedable piece randomizers that generate shape indices in large chunks.
+
+All generators produce the same stream for a given seed no matter how it
+is consumed (one piece at a time, peeked ahead or taken in bulk).
+"""
+import random
+
+PIECE_COUNT = 7
+
+
+class Randomizer:
+    """Base class; subclasses implement `_generate(count)` returning at least `count` shape indices"""
+    name = None
+
+    def __init__(self, seed=None, chunk_size=1024, pieces=PIECE_COUNT):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.chunk_size = chunk_size
+        self.pieces = pieces
+        self.drawn = 0
+        self._buffer = []
+        self._pos = 0
+
+    def _generate(self, count):
+        raise NotImplementedError
+
+    def _ensure(self, count):
+        available = len(self._buffer) - self._pos
+        if available < count:
+            self._buffer = self._buffer[self._pos:] + self._generate(max(self.chunk_size, count - available))
+            self._pos = 0
+
+    def next(self):
+        """Return the next shape index"""
+        if self._pos >= len(self._buffer):
+            self._ensure(1)
+        value = self._buffer[self._pos]
+        self._pos += 1
+        self.drawn += 1
+        return value
+
+    def peek(self, count):
+        """Return the next `count` shape indices without consuming them"""
+        self._ensure(count)
+        return self._buffer[self._pos:self._pos + count]
+
+    def take(self, count):
+        """Consume and return the next `count` shape indices"""
+        self._ensure(count)
+        values = self._buffer[self._pos:self._pos + count]
+        self._pos += count
+        self.drawn += count
+        return values
+
+
+class UniformRandomizer(Randomizer):
+    """Every piece is drawn independently with equal probability"""
+    name = 'uniform'
+
+    def _generate(self, count):
+        return self.rng.choices(range(self.pieces), k=count)
+
+
+class BagRandomizer(Randomizer):
+    """Deals shuffled bags containing one of each piece"""
+    name = 'bag'
+
+    def _generate(self, count):
+        out = []
+        while len(out) < count:
+            bag = list(range(self.pieces))
+            self.rng.shuffle(bag)
+            out.extend(bag)
+        return out
+
+
+class HistoryRandomizer(Randomizer):
+    """Rerolls pieces found in the last few dealt, up to a fixed number of tries"""
+    name = 'history'
+
+    def __init__(self, seed=None, chunk_size=1024, pieces=PIECE_COUNT, history=4, rolls=4):
+        super().__init__(seed, chunk_size, pieces)
+        self.rolls = rolls
+        # Start as if S and Z had just been dealt so the first piece is never one of them
+        self.history = [6, 4] * (history // 2) + [6] * (history % 2)
+
+    def _generate(self, count):
+        out = []
+        history = self.history
+        randrange = self.rng.randrange
+        for _ in range(count):
+            for _ in range(self.rolls):
+                piece = randrange(self.pieces)
+                if piece not in history:
+                    break
+            history.pop(0)
+            history.append(piece)
+            out.append(piece)
+        return out
+
+
+RANDOMIZERS = {cls.name: cls for cls in (UniformRandomizer, BagRandomizer, HistoryRandomizer)}
+
+
+def make_randomizer(name='uniform', seed=None, **kwargs):
+    try:
+        cls = RANDOMIZERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown randomizer {name!r}; use one of {sorted(RANDOMIZERS)}") from None
+    return cls(seed, **kwargs)
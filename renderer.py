@@ -0,0 +1,132 @@
+import pygame
+
+from tetromino import Tetromino
+from lib import draw_score, draw_next_pieces
+
+# Cell values at or above GHOST mark the landing preview of the falling piece
+GHOST = 0x80
+
+
+def compose_frame(state, ghost=True):
+    """Color index of every cell for this frame: the locked grid, ghost and falling piece"""
+    frame = [bytearray(row) for row in state.grid.colors]
+    height = len(frame)
+    piece = state.current_piece
+    value = piece.shape_idx + 1
+    if ghost and not state.game_over:
+        ghost_y = state.ghost_row()
+        if ghost_y != piece.y:
+            for x, y in piece.cells:
+                row = ghost_y + y
+                if 0 <= row < height:
+                    frame[row][piece.x + x] = GHOST + value
+    for x, y in piece.cells:
+        row = piece.y + y
+        if 0 <= row < height:
+            frame[row][piece.x + x] = value
+    return frame
+
+
+class Renderer:
+    """Draws a GameState, touching only the cells that changed since the last frame.
+
+    One block surface per color and the empty grid with its outlines are
+    rendered once; each frame blits changed cells from those and returns the
+    dirty rects to pass to `pygame.display.update`.
+    """
+
+    def __init__(self, surface, block_size, grid_width, grid_height,
+                 colors=Tetromino.COLORS, gray=(128, 128, 128), preview=1, ghost=True):
+        self.surface = surface
+        self.preview = preview
+        self.ghost = ghost
+        self.block_size = block_size
+        self.grid_width = grid_width
+        self.grid_height = grid_height
+        self.game_area = pygame.Rect(0, 0, block_size * grid_width, block_size * grid_height)
+        self.panel = pygame.Rect(self.game_area.width, 0,
+                                 surface.get_width() - self.game_area.width, surface.get_height())
+
+        self.background = pygame.Surface(self.game_area.size)
+        self.background.fill((0, 0, 0))
+        for y in range(grid_height):
+            for x in range(grid_width):
+                pygame.draw.rect(self.background, gray,
+                                 (x * block_size, y * block_size, block_size, block_size), 1)
+
+        self.blocks = []
+        self.ghosts = []
+        for color in colors:
+            block = pygame.Surface((block_size, block_size))
+            block.fill(color)
+            self.blocks.append(block)
+            ghost = self.background.subsurface((0, 0, block_size, block_size)).copy()
+            pygame.draw.rect(ghost, color, (2, 2, block_size - 4, block_size - 4), 2)
+            self.ghosts.append(ghost)
+
+        if pygame.display.get_surface() is not None:
+            self.background = self.background.convert()
+            self.blocks = [block.convert() for block in self.blocks]
+            self.ghosts = [ghost.convert() for ghost in self.ghosts]
+
+        self.invalidate()
+
+    def invalidate(self):
+        """Force the next frame to redraw everything, e.g. after another screen used the display"""
+        self.cells = None
+        self.panel_key = None
+
+    def compose(self, state):
+        return compose_frame(state, self.ghost)
+
+    def _draw_cell(self, x, y, value):
+        size = self.block_size
+        pos = (x * size, y * size)
+        if value >= GHOST:
+            self.surface.blit(self.ghosts[value - GHOST - 1], pos)
+        elif value:
+            self.surface.blit(self.blocks[value - 1], pos)
+        else:
+            self.surface.blit(self.background, pos, (pos[0], pos[1], size, size))
+
+    def draw_board(self, state):
+        frame = self.compose(state)
+        size = self.block_size
+        dirty = []
+        if self.cells is None:
+            self.surface.blit(self.background, self.game_area)
+            for y, row in enumerate(frame):
+                for x, value in enumerate(row):
+                    if value:
+                        self._draw_cell(x, y, value)
+            dirty.append(self.game_area.copy())
+        else:
+            for y, (row, old) in enumerate(zip(frame, self.cells)):
+                if row == old:
+                    continue
+                first = last = None
+                for x, value in enumerate(row):
+                    if value != old[x]:
+                        self._draw_cell(x, y, value)
+                        if first is None:
+                            first = x
+                        last = x
+                dirty.append(pygame.Rect(first * size, y * size, (last - first + 1) * size, size))
+        self.cells = frame
+        return dirty
+
+    def draw_panel(self, state):
+        upcoming = state.preview(self.preview)
+        key = (state.score, tuple(upcoming))
+        if key == self.panel_key:
+            return []
+        self.panel_key = key
+        self.surface.fill((0, 0, 0), self.panel)
+        draw_score(self.surface, state.score, self.panel.x + 10, 20)
+        draw_next_pieces(self.surface, [Tetromino(shape_idx) for shape_idx in upcoming],
+                         self.panel.x + 10, 100, self.block_size)
+        return [self.panel.copy()]
+
+    def draw(self, state):
+        """Draw the changed parts of `state` and return the list of dirty rects"""
+        return self.draw_board(state) + self.draw_panel(state)
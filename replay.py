@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+"""Compact binary replays: the game seed plus every input with its tick.
+
+File layout (little endian):
+    b'TRPL', version (u8), width (u8), height (u8), randomizer (u8), seed (u64)
+    then records of  varint tick delta, action code (u8)
+    and a final record with action code END giving the last tick.
+
+Replays can be re-simulated headless at full speed:
+    python replay.py replays/*.trp
+"""
+import argparse
+import os
+import struct
+import time
+
+from game import GameState, ACTIONS
+
+MAGIC = b'TRPL'
+VERSION = 3  # 3: inputs are applied before gravity, pieces have a lock delay
+END = 0xFF
+_HEADER = struct.Struct('<4sBBBBQ')
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+# Stored by position, so new randomizers must only be appended
+RANDOMIZER_CODES = ('uniform', 'bag', 'history')
+
+
+class ReplayError(Exception):
+    pass
+
+
+def _write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("Truncated replay")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, pos
+        shift += 7
+
+
+class Replay:
+    """Seed, board size, randomizer and the (tick, action) inputs of one game"""
+
+    def __init__(self, seed, width=10, height=20, events=None, end_tick=0, randomizer='uniform'):
+        self.seed = seed
+        self.width = width
+        self.height = height
+        self.randomizer = randomizer
+        self.events = events if events is not None else []
+        self.end_tick = end_tick
+
+    @classmethod
+    def for_game(cls, state):
+        """Start an empty recording for a freshly created GameState"""
+        if state.seed is None:
+            raise ReplayError("Only seeded games can be recorded")
+        return cls(state.seed, state.width, state.height, randomizer=state.randomizer.name)
+
+    def record(self, tick, actions):
+        """Remember the actions passed to GameState.step when `state.ticks == tick`"""
+        for action in actions:
+            self.events.append((tick, action))
+        self.end_tick = max(self.end_tick, tick + 1)
+
+    def to_bytes(self):
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, self.width, self.height,
+                                     RANDOMIZER_CODES.index(self.randomizer), self.seed))
+        last = 0
+        for tick, action in self.events:
+            _write_varint(out, tick - last)
+            out.append(ACTION_CODES[action])
+            last = tick
+        _write_varint(out, self.end_tick - last)
+        out.append(END)
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if len(data) < _HEADER.size:
+            raise ReplayError("Truncated replay header")
+        magic, version, width, height, randomizer, seed = _HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("Not a replay file")
+        if version != VERSION:
+            raise ReplayError(f"Unsupported replay version {version}")
+        if randomizer >= len(RANDOMIZER_CODES):
+            raise ReplayError(f"Unknown randomizer code {randomizer}")
+        events = []
+        pos = _HEADER.size
+        tick = 0
+        while True:
+            delta, pos = _read_varint(data, pos)
+            tick += delta
+            if pos >= len(data):
+                raise ReplayError("Truncated replay")
+            code = data[pos]
+            pos += 1
+            if code == END:
+                return cls(seed, width, height, events, tick, RANDOMIZER_CODES[randomizer])
+            if code >= len(ACTIONS):
+                raise ReplayError(f"Unknown action code {code}")
+            events.append((tick, ACTIONS[code]))
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_bytes(f.read())
+
+    def new_game(self):
+        return GameState(self.width, self.height, seed=self.seed, randomizer=self.randomizer)
+
+    def actions_by_tick(self):
+        """Map of tick -> list of actions, in recorded order"""
+        by_tick = {}
+        for tick, action in self.events:
+            by_tick.setdefault(tick, []).append(action)
+        return by_tick
+
+
+def fast_forward(replay):
+    """Re-simulate a replay headless as fast as possible and return the final GameState"""
+    state = replay.new_game()
+    by_tick = replay.actions_by_tick()
+    while not state.game_over and state.ticks < replay.end_tick:
+        state.step(by_tick.get(state.ticks, ()))
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-simulate replays headless and print their results")
+    parser.add_argument('replays', nargs='+', help="replay files")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.replays:
+        start = time.perf_counter()
+        try:
+            state = fast_forward(Replay.load(path))
+        except (OSError, ReplayError) as e:
+            print(f"{path}: error: {e}")
+            failed = True
+            continue
+        elapsed = time.perf_counter() - start
+        print(f"{path}: score={state.score} lines={state.lines} pieces={state.pieces} "
+              f"ticks={state.ticks} game_over={state.game_over} ({elapsed:.3f}s)")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
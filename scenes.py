@@ -0,0 +1,361 @@
+"""Menu screens as scenes driven by one event loop.
+
+A scene draws itself and reacts to events. `SceneManager.run` keeps a stack
+of scenes instead of calling screens from inside each other, and while the
+top scene is idle it sleeps in `pygame.event.wait`, redrawing only after an
+event changed something. Scenes that animate set `fps` and are redrawn on a
+frame clock instead.
+"""
+from collections import OrderedDict
+
+import pygame
+
+from lib import render_text, render_text_uncached, draw_text_middle, draw_high_scores, load_high_scores
+from scores import get_store
+from scrollview import ScrollView
+
+# Results of Scene.handle besides a new scene to show on top
+REDRAW = 'redraw'  # the scene changed and must be drawn again
+BACK = 'back'      # close this scene and return to the one below
+PLAY = 'play'      # leave the menus and start a game
+QUIT = 'quit'      # leave the menus and exit
+
+FOOTER = "© 2025 Peter Leukanič - MIT License"
+
+
+class Scene:
+    """Base scene; subclasses override `draw` and `handle`"""
+    fps = 0  # frames per second for animated scenes; 0 waits for events
+    timeout = 0  # idle scenes: milliseconds before `idle` is called; 0 waits forever
+
+    def draw(self, surface):
+        pass
+
+    def handle(self, event):
+        """React to one event and return None, a result constant or a Scene to push"""
+        return None
+
+    def update(self, dt):
+        """Advance an animated scene by `dt` seconds"""
+        pass
+
+    def idle(self):
+        """Called when `timeout` passes without events; may return REDRAW"""
+        return None
+
+
+class SceneManager:
+    def __init__(self, surface, on_first_frame=None):
+        self.surface = surface
+        self.clock = pygame.time.Clock()
+        # Called once, right after the first frame is on screen
+        self.on_first_frame = on_first_frame
+
+    def _events(self, scene):
+        if scene.fps:
+            dt = self.clock.tick(scene.fps) / 1000
+            scene.update(dt)
+            return pygame.event.get()
+        event = pygame.event.wait(scene.timeout)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def run(self, scene):
+        """Show `scene` and the scenes it opens until one returns PLAY or QUIT, and return that"""
+        stack = [scene]
+        dirty = True
+        while True:
+            scene = stack[-1]
+            if dirty or scene.fps:
+                self.surface.fill((0, 0, 0))
+                scene.draw(self.surface)
+                pygame.display.flip()
+                dirty = False
+                if self.on_first_frame is not None:
+                    callback, self.on_first_frame = self.on_first_frame, None
+                    callback()
+            events = self._events(scene)
+            if not events and not scene.fps and scene.idle() == REDRAW:
+                dirty = True
+            for event in events:
+                if event.type == pygame.QUIT:
+                    return QUIT
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    dirty = True
+                    continue
+                result = scene.handle(event)
+                if result is None:
+                    continue
+                dirty = True
+                if result in (PLAY, QUIT):
+                    return result
+                if result == BACK:
+                    stack.pop()
+                    if not stack:
+                        return QUIT
+                    self.clock.tick()  # so an animated scene below does not jump
+                    break
+                if isinstance(result, Scene):
+                    stack.append(result)
+                    self.clock.tick()
+                    break
+
+
+def _draw_centered(surface, text, size, y, color=(255, 255, 255)):
+    label = render_text(text, size, color)
+    surface.blit(label, (surface.get_width() // 2 - label.get_width() // 2, y))
+
+
+class MenuScene(Scene):
+    """Numbered options chosen with the number keys"""
+    options = ()  # (label, result or Scene factory) pairs
+
+    def draw_options(self, surface, top, spacing):
+        for i, (label, _) in enumerate(self.options):
+            _draw_centered(surface, f"{i + 1}. {label}", 40, top + i * spacing)
+        _draw_centered(surface, FOOTER, 20, surface.get_height() - 30, (150, 150, 150))
+
+    def handle(self, event):
+        if event.type != pygame.KEYDOWN:
+            return None
+        index = event.key - pygame.K_1
+        if 0 <= index < len(self.options):
+            result = self.options[index][1]
+            return result() if callable(result) else result
+        return None
+
+
+class StartScene(MenuScene):
+    def __init__(self):
+        self.options = (
+            ("Play Game", PLAY),
+            ("View High Scores", HighScoresScene),
+            ("Credits", CreditsScene),
+            ("Quit", QUIT),
+        )
+
+    def draw(self, surface):
+        draw_text_middle(surface, "TETRIS", 60, (255, 255, 255), -180)
+        self.draw_options(surface, surface.get_height() // 2 - 80, 60)
+
+
+class GameOverScene(MenuScene):
+    """Asks for the player's name, records the score, then offers the next step"""
+
+    def __init__(self, score):
+        self.score = score
+        self.name = ""
+        self.entering = True
+        self.options = (
+            ("Play Again", PLAY),
+            ("View High Scores", HighScoresScene),
+            ("Credits", CreditsScene),
+            ("Quit", QUIT),
+        )
+
+    def draw(self, surface):
+        if self.entering:
+            middle = surface.get_height() // 2
+            prompt = render_text("Enter your name:", 40)
+            name = render_text(self.name, 40)
+            surface.blit(prompt, (surface.get_width() // 2 - prompt.get_width() // 2, middle - 50))
+            surface.blit(name, (surface.get_width() // 2 - name.get_width() // 2, middle + 10))
+            return
+        draw_text_middle(surface, "GAME OVER", 50, (255, 255, 255), -150)
+        draw_text_middle(surface, f"Your Score: {self.score}", 40, (255, 255, 255), -100)
+        self.draw_options(surface, surface.get_height() // 2 - 50, 50)
+
+    def handle(self, event):
+        if not self.entering:
+            return super().handle(event)
+        if event.type != pygame.KEYDOWN:
+            return None
+        if event.key == pygame.K_RETURN:
+            get_store().add(self.name if self.name.strip() else "Player", self.score)
+            self.entering = False
+        elif event.key == pygame.K_BACKSPACE:
+            self.name = self.name[:-1]
+        elif event.unicode and event.unicode.isprintable():
+            self.name += event.unicode
+        else:
+            return None
+        return REDRAW
+
+
+class HighScoresScene(Scene):
+    # Scores may be added by other game instances sharing the database
+    timeout = 5000
+
+    def __init__(self):
+        self.scores = load_high_scores()
+
+    def idle(self):
+        scores = load_high_scores()
+        if scores != self.scores:
+            self.scores = scores
+            return REDRAW
+        return None
+
+    def draw(self, surface):
+        draw_text_middle(surface, "HIGH SCORES", 60, (255, 255, 255), -180)
+        if self.scores:
+            draw_high_scores(surface, self.scores,
+                             surface.get_width() // 2 - 100,
+                             surface.get_height() // 2 - 100)
+        else:
+            draw_text_middle(surface, "No scores yet!", 40, (255, 255, 255), 0)
+        draw_text_middle(surface, "H: full history   ESC: return", 30, (255, 255, 255), 200)
+
+    def handle(self, event):
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
+                return BACK
+            if event.key == pygame.K_h:
+                return ScoreHistoryScene()
+        return None
+
+
+CREDITS = [
+    "CREDITS",
+    "",
+    "Game Development",
+    "Peter Leukanič",
+    "",
+    "Programming",
+    "Peter Leukanič",
+    "",
+    "Game Design",
+    "Peter Leukanič",
+    "",
+    "Special Thanks",
+    "Pygame Community",
+    "",
+    "License",
+    "MIT License",
+    "",
+    "© 2025 All Rights Reserved"
+]
+
+
+class CreditsScene(Scene):
+    """Credits scrolling from bottom to top"""
+    fps = 60
+    line_height = 40
+
+    def __init__(self, lines=CREDITS):
+        self.lines = lines
+        self.speed = 1  # pixels per frame at 60 fps
+        self.view = None
+
+    def _render_line(self, index):
+        text = self.lines[index]
+        if not text:
+            return None
+        return render_text(text, 50, bold=True) if text == "CREDITS" else render_text(text, 30)
+
+    def update(self, dt):
+        view = self.view
+        if view is None:
+            return
+        view.offset += self.speed * dt * 60
+        # Start again from below the screen once the last line has gone off the top
+        if view.offset > view.content_height():
+            view.offset = -view.rect.height
+
+    def draw(self, surface):
+        if self.view is None:
+            self.view = ScrollView(surface.get_rect(), self.line_height, len(self.lines), self._render_line)
+            self.view.offset = -surface.get_height()
+        self.view.draw(surface)
+        speed = render_text(f"Scroll Speed: {self.speed:.1f}x (Up/Down to adjust, SPACE to pause)",
+                            20, (150, 150, 150))
+        surface.blit(speed, (20, surface.get_height() - 30))
+
+    def handle(self, event):
+        if event.type != pygame.KEYDOWN:
+            return None
+        if event.key == pygame.K_ESCAPE:
+            return BACK
+        if event.key == pygame.K_UP:
+            self.speed = max(1, self.speed - 0.5)
+        elif event.key == pygame.K_DOWN:
+            self.speed = min(5, self.speed + 0.5)
+        elif event.key == pygame.K_SPACE:
+            self.speed = 0
+        return None
+
+
+class ScoreHistoryScene(Scene):
+    """Every recorded score, best first, read from the database a page at a time"""
+    line_height = 30
+    page_size = 100
+    max_pages = 8
+
+    def __init__(self, store=None):
+        self.store = store or get_store()
+        self.count = self.store.count()
+        self.pages = OrderedDict()
+        self.view = None
+
+    def _row(self, index):
+        page, row = divmod(index, self.page_size)
+        rows = self.pages.get(page)
+        if rows is None:
+            rows = self.pages[page] = self.store.history(page * self.page_size, self.page_size)
+            if len(self.pages) > self.max_pages:
+                self.pages.popitem(last=False)
+        else:
+            self.pages.move_to_end(page)
+        return rows[row] if row < len(rows) else None
+
+    def _render_line(self, index):
+        row = self._row(index)
+        if row is None:
+            return None
+        rank, name, score = row
+        # Rendered directly: these lines would only crowd out render_text's cache
+        return render_text_uncached(f"{rank}. {name}: {score}", 24)
+
+    def draw(self, surface):
+        if self.view is None:
+            rect = pygame.Rect(40, 80, surface.get_width() - 80, surface.get_height() - 140)
+            self.view = ScrollView(rect, self.line_height, self.count, self._render_line, align='left')
+        _draw_centered(surface, "SCORE HISTORY", 50, 15)
+        if not self.count:
+            draw_text_middle(surface, "No scores yet! Press ESC to return", 30, (255, 255, 255), 0)
+            return
+        self.view.draw(surface)
+        # Only lines shown in full are counted
+        offset = int(self.view.offset)
+        first = -(-offset // self.line_height) + 1
+        last = min(self.count, (offset + self.view.rect.height) // self.line_height)
+        _draw_centered(surface, f"{first}-{last} of {self.count}   Up/Down, PgUp/PgDn, Home/End, ESC",
+                       20, surface.get_height() - 40, (150, 150, 150))
+
+    def handle(self, event):
+        view = self.view
+        if event.type == pygame.MOUSEWHEEL and view is not None:
+            return REDRAW if view.scroll_by(-event.y * 3 * self.line_height) else None
+        if event.type != pygame.KEYDOWN:
+            return None
+        if event.key == pygame.K_ESCAPE:
+            return BACK
+        if view is None:
+            return None
+        page = (view.visible_lines() - 1) * self.line_height
+        steps = {
+            pygame.K_UP: -self.line_height,
+            pygame.K_DOWN: self.line_height,
+            pygame.K_PAGEUP: -page,
+            pygame.K_PAGEDOWN: page,
+        }
+        if event.key in steps:
+            moved = view.scroll_by(steps[event.key])
+        elif event.key == pygame.K_HOME:
+            moved = view.scroll_to(0)
+        elif event.key == pygame.K_END:
+            moved = view.scroll_to(view.max_offset())
+        else:
+            return None
+        return REDRAW if moved else None
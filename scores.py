@@ -0,0 +1,125 @@
+"""High-score storage in SQLite, safe to share between game instances.
+
+The database runs in WAL mode, so readers never block the single writer,
+and every new score is one atomic INSERT. Scores from an old
+highscores.json next to the database are imported the first time it is
+created.
+"""
+import json
+import os
+import sqlite3
+import time
+import warnings
+
+# Directory shared by all instances on a host; override with TETRIS_SCORES_DIR
+SCORES_DIR = os.environ.get('TETRIS_SCORES_DIR', '.')
+DB_NAME = 'highscores.db'
+LEGACY_FILE = 'highscores.json'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_rank ON scores (score DESC, id ASC);
+"""
+
+
+class ScoreStore:
+    """Full score history with indexed top-N queries and an in-memory top list cache"""
+
+    def __init__(self, path, timeout=10.0):
+        self.path = path
+        self.timeout = timeout
+        self._conn = None
+        self._top = None
+        self._data_version = None
+
+    def _connect(self):
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # Autocommit mode; multi-statement writes use explicit transactions
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+            self._import_legacy()
+        return self._conn
+
+    def _import_legacy(self):
+        legacy = os.path.join(os.path.dirname(self.path), LEGACY_FILE)
+        if not os.path.exists(legacy):
+            return
+        conn = self._conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM scores LIMIT 1").fetchone() is None:
+                try:
+                    with open(legacy, 'r') as f:
+                        entries = json.load(f)
+                    rows = [(str(e['name']), int(e['score']), 0.0) for e in entries]
+                except (OSError, ValueError, TypeError, KeyError) as e:
+                    warnings.warn(f"Could not import {legacy}: {e}")
+                    rows = []
+                conn.executemany("INSERT INTO scores (name, score, created_at) VALUES (?, ?, ?)", rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _changed_elsewhere(self):
+        # data_version moves whenever another connection commits
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        changed = version != self._data_version
+        self._data_version = version
+        return changed
+
+    def add(self, name, score):
+        """Insert one score atomically and return its row id"""
+        conn = self._connect()
+        cursor = conn.execute("INSERT INTO scores (name, score, created_at) VALUES (?, ?, ?)",
+                              (name, int(score), time.time()))
+        self._top = None
+        return cursor.lastrowid
+
+    def top(self, n=10):
+        """Best `n` scores as a list of {'name', 'score'} dicts, best first"""
+        conn = self._connect()
+        # The cache holds the best `limit` rows, which also answers any smaller n
+        if self._changed_elsewhere() or self._top is None or self._top[0] < n:
+            rows = conn.execute("SELECT name, score FROM scores ORDER BY score DESC, id ASC LIMIT ?",
+                                (n,)).fetchall()
+            self._top = (n, [{'name': name, 'score': score} for name, score in rows])
+        return [dict(entry) for entry in self._top[1][:n]]
+
+    def history(self, offset=0, limit=50):
+        """One page of the full ranked history as (rank, name, score) tuples"""
+        conn = self._connect()
+        rows = conn.execute("SELECT name, score FROM scores ORDER BY score DESC, id ASC LIMIT ? OFFSET ?",
+                            (limit, offset)).fetchall()
+        return [(offset + i + 1, name, score) for i, (name, score) in enumerate(rows)]
+
+    def count(self):
+        return self._connect().execute("SELECT COUNT(*) FROM scores").fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+            self._top = None
+
+
+_store = None
+
+
+def get_store():
+    """Process-wide store for SCORES_DIR, opened on first use"""
+    global _store
+    if _store is None:
+        _store = ScoreStore(os.path.join(SCORES_DIR, DB_NAME))
+    return _store
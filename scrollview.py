@@ -0,0 +1,80 @@
+"""Virtualized vertical list of text lines.
+
+Only the lines inside the view are rendered. Rendered lines are kept in a
+small pool sized to a few screens, so memory stays the same whether the
+list has twenty lines or a hundred thousand.
+"""
+from collections import OrderedDict
+
+import pygame
+
+
+class ScrollView:
+    """Scrollable list of `count` lines drawn inside `rect`.
+
+    `render_line(index)` returns the Surface for a line (or None for a blank
+    line) and is only called for lines that scroll into view and are not in
+    the pool. `offset` is the pixel position of the view's top edge in the
+    list; it may be negative or past the end, which shows blank space.
+    """
+
+    def __init__(self, rect, line_height, count, render_line, align='center', pool_size=None):
+        self.rect = pygame.Rect(rect)
+        self.line_height = line_height
+        self.count = count
+        self.render_line = render_line
+        self.align = align
+        self.offset = 0.0
+        self.pool_size = pool_size or (self.visible_lines() + 2) * 2
+        self._pool = OrderedDict()
+
+    def visible_lines(self):
+        return self.rect.height // self.line_height
+
+    def content_height(self):
+        return self.count * self.line_height
+
+    def max_offset(self):
+        return max(0, self.content_height() - self.rect.height)
+
+    def scroll_to(self, offset):
+        """Move to `offset`, kept within the list; returns True if the view moved"""
+        offset = min(max(0, offset), self.max_offset())
+        moved = offset != self.offset
+        self.offset = offset
+        return moved
+
+    def scroll_by(self, pixels):
+        return self.scroll_to(self.offset + pixels)
+
+    def _line(self, index):
+        pool = self._pool
+        if index in pool:
+            pool.move_to_end(index)
+            return pool[index]
+        line = pool[index] = self.render_line(index)
+        if len(pool) > self.pool_size:
+            pool.popitem(last=False)
+        return line
+
+    def draw(self, surface, background=(0, 0, 0)):
+        """Draw the lines in view and return the view's rect"""
+        rect = self.rect
+        surface.fill(background, rect)
+        clip = surface.get_clip()
+        surface.set_clip(rect)
+        offset = int(self.offset)
+        first = max(0, offset // self.line_height)
+        last = min(self.count, (offset + rect.height) // self.line_height + 1)
+        for index in range(first, last):
+            line = self._line(index)
+            if line is None:
+                continue
+            y = rect.y + index * self.line_height - offset
+            if self.align == 'center':
+                x = rect.centerx - line.get_width() // 2
+            else:
+                x = rect.x
+            surface.blit(line, (x, y))
+        surface.set_clip(clip)
+        return rect
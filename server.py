@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+"""Versus server: runs every player's game and streams the changes to the clients.
+
+Clients join a room by name; a room starts when it has the number of
+players asked for by whoever opened it. Every game is simulated here with
+the rules in game.py, from the inputs the clients send, and one ticker
+steps all running rooms together. Each step a room encodes one FRAME with
+what changed on each board (see net.py) and sends the same bytes to all of
+its players. Clearing two or more rows at once sends garbage to a random
+opponent, after cancelling any garbage waiting on the sender's own board.
+
+    python server.py                         # port 7777, rooms of 2 by default
+    python server.py --port 9000 --players 4 --stats
+"""
+import argparse
+import asyncio
+import random
+import socket
+import sys
+import traceback
+
+import net
+from game import GameState, STEP_TIME
+from randomizer import RANDOMIZERS
+
+GARBAGE_LINES = (0, 0, 1, 2, 4)  # garbage sent for clearing 0, 1, 2, 3 and 4 rows at once
+MAX_INPUTS = 32  # actions a player may have waiting for the next step
+MAX_BUFFERED = 256 * 1024  # bytes queued for a client that is not reading before it is dropped
+MAX_LAG = 0.25  # seconds; further behind than this the server skips steps instead of catching up
+HELLO_TIMEOUT = 10  # seconds a new connection has to say which room it wants
+
+
+async def read_message(reader):
+    """Next (type, payload) from a stream"""
+    header = await reader.readexactly(2)
+    length = int.from_bytes(header, 'little')
+    if not length:
+        raise net.ProtocolError("Empty message")
+    body = await reader.readexactly(length)
+    return body[0], body[1:]
+
+
+class Player:
+    def __init__(self, writer, name):
+        self.writer = writer
+        self.name = name
+        self.inputs = []
+        self.state = None
+        self.tracker = None
+        self.connected = True
+
+    def send(self, data):
+        if not self.connected:
+            return 0
+        transport = self.writer.transport
+        if transport.is_closing():
+            self.connected = False
+            return 0
+        if transport.get_write_buffer_size() > MAX_BUFFERED:
+            # Not reading fast enough to follow the game
+            self.connected = False
+            transport.abort()
+            return 0
+        self.writer.write(data)
+        return len(data)
+
+
+class Room:
+    """Players waiting for or playing one versus game"""
+
+    def __init__(self, name, size, width, height, randomizer, rng):
+        self.name = name
+        self.size = size
+        self.width = width
+        self.height = height
+        self.randomizer = randomizer
+        self.rng = rng
+        self.players = []
+        self.started = False
+        self.over = False
+        self.out = []  # player indexes in the order they topped out
+        self.tick = 0
+        self.sent = 0
+
+    def broadcast(self, data):
+        for player in self.players:
+            self.sent += player.send(data)
+
+    def join(self, player):
+        self.players.append(player)
+        self.broadcast(net.message(net.LOBBY, bytes((len(self.players), self.size))))
+        if len(self.players) == self.size:
+            self.start()
+
+    def leave(self, player):
+        if not self.started:
+            self.players.remove(player)
+            self.broadcast(net.message(net.LOBBY, bytes((len(self.players), self.size))))
+        else:
+            # A player who disconnects mid-game forfeits
+            player.connected = False
+            player.state.game_over = True
+
+    def start(self):
+        # Everyone gets the same pieces
+        seed = self.rng.getrandbits(64)
+        names = [player.name for player in self.players]
+        for index, player in enumerate(self.players):
+            player.state = GameState(self.width, self.height, seed=seed, randomizer=self.randomizer)
+            player.tracker = net.BoardTracker(self.width, self.height)
+            self.sent += player.send(net.start(self.width, self.height, index, names))
+        self.started = True
+
+    def _attack(self, player, cleared):
+        lines = player.state.cancel_garbage(GARBAGE_LINES[min(cleared, 4)])
+        targets = [p for p in self.players if p is not player and not p.state.game_over]
+        if lines and targets:
+            self.rng.choice(targets).state.queue_garbage(lines, self.rng.randrange(self.width))
+
+    def step(self):
+        """Advance every game by one step and send what changed"""
+        self.tick += 1
+        players = self.players
+        for player in players:
+            state = player.state
+            if state.game_over:
+                continue
+            actions, player.inputs = player.inputs, []
+            cleared = state.step(actions)
+            if cleared:
+                self._attack(player, cleared)
+        for index, player in enumerate(players):
+            if player.state.game_over and index not in self.out:
+                self.out.append(index)
+        data = net.frame(self.tick, [(index, player.tracker.delta(player.state))
+                                     for index, player in enumerate(players)])
+        if data is not None:
+            self.broadcast(data)
+        # A versus game ends when one player is left; a game on your own when you top out
+        if len(self.out) >= max(1, len(players) - 1):
+            self.finish()
+
+    def finish(self):
+        ranking = [index for index in range(len(self.players)) if index not in self.out]
+        ranking += reversed(self.out)
+        self.broadcast(net.end(ranking))
+        self.over = True
+        for player in self.players:
+            player.writer.close()
+
+
+class Server:
+    """Accepts connections, sorts them into rooms and steps all running rooms"""
+
+    def __init__(self, players=2, width=10, height=20, randomizer='bag', seed=None):
+        self.players = players
+        self.width = width
+        self.height = height
+        self.randomizer = randomizer
+        self.rng = random.Random(seed)
+        self.rooms = {}
+        self.running = []
+        self.sent = 0
+        self.steps = 0
+        self._wake = asyncio.Event()
+
+    async def handle(self, reader, writer):
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        room = player = None
+        try:
+            kind, payload = await asyncio.wait_for(read_message(reader), HELLO_TIMEOUT)
+            if kind != net.HELLO:
+                raise net.ProtocolError("Expected hello")
+            name, room_name, wanted = net.parse_hello(payload)
+            room = self.rooms.get(room_name)
+            if room is None:
+                room = Room(room_name, wanted or self.players, self.width, self.height,
+                            self.randomizer, random.Random(self.rng.getrandbits(64)))
+                self.rooms[room_name] = room
+            elif room.started:
+                writer.write(net.error(f"Room {room_name!r} is already playing"))
+                room = None
+                return
+            player = Player(writer, name or f"Player {len(room.players) + 1}")
+            room.join(player)
+            if room.started:
+                self.running.append(room)
+                self._wake.set()
+
+            while True:
+                kind, payload = await read_message(reader)
+                if kind != net.INPUT:
+                    raise net.ProtocolError(f"Unexpected message type {kind}")
+                if room.started and not room.over:
+                    actions = net.parse_inputs(payload)
+                    player.inputs += actions[:MAX_INPUTS - len(player.inputs)]
+        except net.ProtocolError as e:
+            writer.write(net.error(str(e)))
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            if room is not None and player is not None and not room.over:
+                room.leave(player)
+                if not room.players and self.rooms.get(room.name) is room:
+                    del self.rooms[room.name]
+            writer.close()
+
+    async def tick(self):
+        """Step every running room once per STEP_TIME"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time()
+        while True:
+            if not self.running:
+                # Nothing to simulate, so sleep until a room starts
+                self._wake.clear()
+                await self._wake.wait()
+                deadline = loop.time()
+            for room in self.running:
+                try:
+                    room.step()
+                except Exception:
+                    # A bug in one game must not stop every other room
+                    print(f"Room {room.name!r} stopped on tick {room.tick}:", file=sys.stderr)
+                    traceback.print_exc()
+                    room.finish()
+                self.sent += room.sent
+                room.sent = 0
+            self.steps += 1
+            if any(room.over for room in self.running):
+                for room in self.running:
+                    if room.over and self.rooms.get(room.name) is room:
+                        del self.rooms[room.name]
+                self.running = [room for room in self.running if not room.over]
+            deadline += STEP_TIME
+            delay = deadline - loop.time()
+            if delay < -MAX_LAG:
+                deadline = loop.time()
+            await asyncio.sleep(max(0, delay))
+
+    async def report(self, interval):
+        last_sent, last_steps = self.sent, self.steps
+        while True:
+            await asyncio.sleep(interval)
+            players = sum(len(room.players) for room in self.running)
+            print(f"{len(self.running)} rooms playing, {players} players, "
+                  f"{(self.steps - last_steps) / interval:.0f} steps/s, "
+                  f"{(self.sent - last_sent) / interval / 1024:.1f} KiB/s sent")
+            last_sent, last_steps = self.sent, self.steps
+
+    async def serve(self, host, port, stats=None):
+        server = await asyncio.start_server(self.handle, host, port)
+        tasks = [asyncio.create_task(self.tick())]
+        if stats:
+            tasks.append(asyncio.create_task(self.report(stats)))
+        names = ', '.join(str(sock.getsockname()[:2]) for sock in server.sockets)
+        print(f"Listening on {names}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tetris versus server")
+    parser.add_argument('--host', default='0.0.0.0', help="address to listen on")
+    parser.add_argument('--port', type=int, default=net.PORT, help="TCP port")
+    parser.add_argument('--players', type=int, default=2,
+                        help="players per room when the first client does not ask for a number")
+    parser.add_argument('--randomizer', default='bag', choices=sorted(RANDOMIZERS), help="piece randomizer")
+    parser.add_argument('--seed', type=int, default=None, help="seed for game seeds and garbage holes")
+    parser.add_argument('--stats', type=float, default=None, metavar='SECONDS',
+                        help="print rooms, players and bandwidth every SECONDS")
+    args = parser.parse_args()
+    if not 1 <= args.players <= 255:
+        parser.error("--players must be between 1 and 255")
+
+    server = Server(args.players, randomizer=args.randomizer, seed=args.seed)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.stats))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
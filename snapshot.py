@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+"""Compact binary snapshots of a game in progress.
+
+File layout (little endian):
+    header: b'TSNP', version, width, height, randomizer code, seed (u64),
+            pieces drawn from the randomizer, score, lines, pieces, ticks,
+            gravity and lock-delay counters, current and next piece
+            (shape, rotation, x, y) and the position hash (u64)
+    garbage: queued garbage count (u8), then lines and hole column (u8 each)
+            for each entry, oldest first
+    board:  one occupancy bit per cell, row by row, then 4 bits of color
+            for each occupied cell in the same order
+
+The randomizer is stored as its seed and the number of pieces drawn; its
+stream does not depend on how it was consumed, so it is restored by drawing
+that many pieces again. A 10x20 board takes at most 125 bytes.
+
+    python snapshot.py saves/*.tsnp    # print what each snapshot holds
+"""
+import argparse
+import os
+import struct
+
+from board import splitmix64
+from game import GameState
+from replay import RANDOMIZER_CODES
+from tetromino import Tetromino
+
+MAGIC = b'TSNP'
+VERSION = 2
+_HEADER = struct.Struct('<4sBBBBQIIIIIHHHHBBBhhBBhhQ')
+_COLOR_BITS = 4  # piece colors and game.GARBAGE
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def _piece_key(role, piece):
+    # Bit 48 keeps these inputs apart from the board's cell numbers
+    return splitmix64(1 << 48 | role << 40 | piece.shape_idx << 32 | piece.rotation << 24 |
+                      (piece.x & 0xFF) << 16 | (piece.y & 0xFF) << 8)
+
+
+def position_hash(state):
+    """Zobrist hash of a game position: the board's occupied cells plus the current and next piece.
+
+    The board part is kept up to date by the Board itself, so this is cheap
+    enough to use as a cache or deduplication key for every position.
+    """
+    return state.grid.hash ^ _piece_key(0, state.current_piece) ^ _piece_key(1, state.next_piece)
+
+
+def _pack_board(grid):
+    width = grid.width
+    occupancy = 0
+    colors = 0
+    count = 0
+    for y, row in enumerate(grid.rows):
+        if not row:
+            continue
+        occupancy |= row << (y * width)
+        line = grid.colors[y]
+        for x in range(width):
+            if row >> x & 1:
+                value = line[x]
+                if value >> _COLOR_BITS:
+                    raise SnapshotError(f"Color {value} does not fit in a snapshot")
+                colors |= value << (count * _COLOR_BITS)
+                count += 1
+    return (occupancy.to_bytes((width * grid.height + 7) // 8, 'little') +
+            colors.to_bytes((count * _COLOR_BITS + 7) // 8, 'little'))
+
+
+def _pack_garbage(garbage):
+    if len(garbage) > 0xFF or any(lines > 0xFF for lines, hole in garbage):
+        raise SnapshotError("Too much queued garbage for a snapshot")
+    return bytes((len(garbage),)) + b''.join(bytes(entry) for entry in garbage)
+
+
+def _unpack_garbage(data, width):
+    """(queued garbage, bytes read) from the start of `data`"""
+    if not data or len(data) < 1 + 2 * data[0]:
+        raise SnapshotError("Truncated snapshot garbage")
+    garbage = [(data[i], data[i + 1]) for i in range(1, 1 + 2 * data[0], 2)]
+    if any(not lines or hole >= width for lines, hole in garbage):
+        raise SnapshotError("Invalid garbage in snapshot")
+    return garbage, 1 + 2 * len(garbage)
+
+
+def _unpack_board(grid, data):
+    width = grid.width
+    size = (width * grid.height + 7) // 8
+    if len(data) < size:
+        raise SnapshotError("Truncated snapshot board")
+    occupancy = int.from_bytes(data[:size], 'little')
+    colors = int.from_bytes(data[size:], 'little')
+    color_mask = (1 << _COLOR_BITS) - 1
+    for y in range(grid.height):
+        row = occupancy >> (y * width) & grid.full_mask
+        if not row:
+            continue
+        grid.rows[y] = row
+        line = grid.colors[y]
+        x = 0
+        while row:
+            if row & 1:
+                value = colors & color_mask
+                if not value:
+                    raise SnapshotError("Truncated snapshot colors")
+                line[x] = value
+                colors >>= _COLOR_BITS
+            row >>= 1
+            x += 1
+    grid.reindex()
+
+
+def to_bytes(state):
+    if state.seed is None:
+        raise SnapshotError("Only seeded games can be saved")
+    current, following = state.current_piece, state.next_piece
+    header = _HEADER.pack(
+        MAGIC, VERSION, state.width, state.height, RANDOMIZER_CODES.index(state.randomizer.name),
+        state.seed, state.randomizer.drawn, state.score, state.lines, state.pieces, state.ticks,
+        state.fall_ticks, state.gravity_ticks, state.lock_ticks, state.lock_delay_ticks, state.lock_resets,
+        current.shape_idx, current.rotation, current.x, current.y,
+        following.shape_idx, following.rotation, following.x, following.y,
+        position_hash(state))
+    return header + _pack_garbage(state.garbage) + _pack_board(state.grid)
+
+
+def _piece(shape_idx, rotation, x, y, width):
+    if shape_idx >= len(Tetromino.SHAPES) or rotation >= 4:
+        raise SnapshotError("Invalid piece in snapshot")
+    piece = Tetromino(shape_idx, grid_width=width)
+    piece.rotation = rotation
+    piece.x = x
+    piece.y = y
+    return piece
+
+
+def from_bytes(data):
+    """Rebuild the GameState saved by `to_bytes`"""
+    if len(data) < _HEADER.size:
+        raise SnapshotError("Truncated snapshot header")
+    (magic, version, width, height, randomizer, seed, drawn, score, lines, pieces, ticks,
+     fall_ticks, gravity_ticks, lock_ticks, lock_delay_ticks, lock_resets,
+     shape, rotation, x, y, next_shape, next_rotation, next_x, next_y,
+     expected_hash) = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("Not a snapshot file")
+    if version != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version {version}")
+    if randomizer >= len(RANDOMIZER_CODES):
+        raise SnapshotError(f"Unknown randomizer code {randomizer}")
+
+    state = GameState(width, height, seed=seed, randomizer=RANDOMIZER_CODES[randomizer])
+    # The new game has drawn its first pieces; draw on to the saved position
+    if drawn < state.randomizer.drawn:
+        raise SnapshotError("Invalid randomizer position in snapshot")
+    state.randomizer.take(drawn - state.randomizer.drawn)
+    state.score, state.lines, state.pieces, state.ticks = score, lines, pieces, ticks
+    state.fall_ticks, state.gravity_ticks = fall_ticks, gravity_ticks
+    state.lock_ticks, state.lock_delay_ticks, state.lock_resets = lock_ticks, lock_delay_ticks, lock_resets
+    state.current_piece = _piece(shape, rotation, x, y, width)
+    state.next_piece = _piece(next_shape, next_rotation, next_x, next_y, width)
+    state.garbage, size = _unpack_garbage(data[_HEADER.size:], width)
+    _unpack_board(state.grid, data[_HEADER.size + size:])
+    if position_hash(state) != expected_hash:
+        raise SnapshotError("Snapshot is corrupt: position hash does not match")
+    return state
+
+
+def save(state, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(to_bytes(state))
+
+
+def load(path):
+    with open(path, 'rb') as f:
+        return from_bytes(f.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print the position stored in game snapshots")
+    parser.add_argument('snapshots', nargs='+', help="snapshot files")
+    args = parser.parse_args()
+
+    failed = False
+    for path in args.snapshots:
+        try:
+            state = load(path)
+        except (OSError, SnapshotError) as e:
+            print(f"{path}: error: {e}")
+            failed = True
+            continue
+        print(f"{path}: score={state.score} lines={state.lines} pieces={state.pieces} "
+              f"ticks={state.ticks} hash={position_hash(state):016x}")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+"""Spectator wall: many games tiled in one window.
+
+Boards are drawn from one sprite atlas holding a tile per color, each into
+its own cached surface that only redraws the cells that changed. A board's
+surface is copied to the window only on frames where it changed.
+
+    python spectator.py --games 64                 # bot games
+    python spectator.py replays/*.trp              # recorded games
+"""
+import argparse
+import math
+import time
+
+import pygame
+
+from tetromino import Tetromino
+from game import GameState
+from lib import render_text_uncached
+from renderer import compose_frame
+from replay import Replay, ReplayError
+from randomizer import RANDOMIZERS
+from tournament import load_policy, policy_rng, POLICIES
+from ai import AutoPlayer, Planner
+
+BACKGROUND = (20, 20, 20)
+EMPTY = (0, 0, 0)
+GRAY = (64, 64, 64)
+
+
+def watch_policy(rng):
+    """Planner without lookahead, moving at a pace that can be followed"""
+    return AutoPlayer(Planner(lookahead=False), interval=6)
+
+
+class SpriteAtlas:
+    """One surface holding a tile per cell value: 0 is an empty cell, 1..n the piece colors"""
+
+    def __init__(self, block_size, colors=Tetromino.COLORS, gray=GRAY):
+        self.block_size = block_size
+        self.surface = pygame.Surface(((len(colors) + 1) * block_size, block_size))
+        self.surface.fill(EMPTY)
+        outline = block_size >= 6
+        for i, color in enumerate((None,) + tuple(colors)):
+            tile = pygame.Rect(i * block_size, 0, block_size, block_size)
+            if color is None:
+                if outline:
+                    pygame.draw.rect(self.surface, gray, tile, 1)
+            else:
+                self.surface.fill(color, tile.inflate(-1, -1) if outline else tile)
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.areas = [pygame.Rect(i * block_size, 0, block_size, block_size)
+                      for i in range(len(colors) + 1)]
+
+
+class BoardView:
+    """Cached picture of one board, redrawn cell by cell from the atlas"""
+
+    def __init__(self, atlas, width, height):
+        self.atlas = atlas
+        self.surface = pygame.Surface((width * atlas.block_size, height * atlas.block_size))
+        if pygame.display.get_surface() is not None:
+            self.surface = self.surface.convert()
+        self.width = width
+        self.cells = None
+
+    def update(self, frame):
+        """Bring the cached surface up to date with `frame`; returns True if anything changed"""
+        atlas = self.atlas
+        size = atlas.block_size
+        areas = atlas.areas
+        image = atlas.surface
+        old = self.cells
+        blits = []
+        for y, row in enumerate(frame):
+            if old is not None and row == old[y]:
+                continue
+            top = y * size
+            previous = old[y] if old is not None else None
+            for x, value in enumerate(row):
+                if previous is None or value != previous[x]:
+                    blits.append((image, (x * size, top), areas[value]))
+        self.cells = frame
+        if blits:
+            self.surface.blits(blits, doreturn=False)
+        return bool(blits)
+
+
+def layout(count, board_width, board_height, area, caption=True):
+    """Block size and board positions that fit `count` boards into `area` (width, height)"""
+    gap = 6
+    best = (0, 1)
+    for columns in range(1, count + 1):
+        rows = math.ceil(count / columns)
+        block_w = (area[0] - gap * (columns + 1)) // (columns * board_width)
+        # Leave room for a caption two blocks tall above each board
+        block_h = (area[1] - gap * (rows + 1)) // (rows * (board_height + (2 if caption else 0)))
+        size = min(block_w, block_h)
+        if size > best[0]:
+            best = (size, columns)
+    size, columns = best
+    if size < 1:
+        raise ValueError(f"{count} boards do not fit in a {area[0]}x{area[1]} window")
+    caption_height = 2 * size if caption else 0
+    cell_w = board_width * size + gap
+    cell_h = board_height * size + caption_height + gap
+    positions = [(gap + (i % columns) * cell_w, gap + (i // columns) * cell_h + caption_height)
+                 for i in range(count)]
+    return size, positions
+
+
+class SpectatorWall:
+    """Draws a list of GameStates tiled across `surface`, returning the dirty rects each frame"""
+
+    def __init__(self, surface, count, board_width=10, board_height=20, colors=Tetromino.COLORS):
+        self.surface = surface
+        self.block_size, self.positions = layout(count, board_width, board_height, surface.get_size())
+        self.atlas = SpriteAtlas(self.block_size, colors)
+        self.views = [BoardView(self.atlas, board_width, board_height) for _ in range(count)]
+        self.board_size = (board_width * self.block_size, board_height * self.block_size)
+        self.font_size = max(10, int(self.block_size * 1.6))
+        self.captions = [None] * count
+        surface.fill(BACKGROUND)
+        self.full_redraw = True
+
+    def _caption(self, i, text):
+        if text == self.captions[i]:
+            return None
+        self.captions[i] = text
+        x, y = self.positions[i]
+        rect = pygame.Rect(x, y - 2 * self.block_size, self.board_size[0], 2 * self.block_size)
+        self.surface.fill(BACKGROUND, rect)
+        self.surface.blit(render_text_uncached(text, self.font_size, (200, 200, 200)), rect)
+        return rect
+
+    def draw(self, states, labels=None):
+        dirty = []
+        for i, (state, view) in enumerate(zip(states, self.views)):
+            if view.update(compose_frame(state, ghost=False)):
+                dirty.append(self.surface.blit(view.surface, self.positions[i]))
+            label = labels[i] if labels else ""
+            text = f"{label}{state.score}" + ("  over" if state.game_over else "")
+            rect = self._caption(i, text)
+            if rect is not None:
+                dirty.append(rect)
+        if self.full_redraw:
+            self.full_redraw = False
+            return [self.surface.get_rect()]
+        return dirty
+
+
+class BotFeed:
+    """A bot playing game after game, each with the next seed"""
+
+    def __init__(self, seed, policy, randomizer='uniform', pause=90):
+        self.seed = seed
+        self.factory = load_policy(policy) if isinstance(policy, str) else policy
+        self.randomizer = randomizer
+        self.pause = pause
+        self.label = ""
+        self._start()
+
+    def _start(self):
+        self.state = GameState(seed=self.seed, randomizer=self.randomizer)
+        self.policy = self.factory(policy_rng(self.seed))
+        self.wait = self.pause
+
+    def advance(self):
+        state = self.state
+        if state.game_over:
+            # Leave the final board up for a moment before the next game
+            self.wait -= 1
+            if self.wait <= 0:
+                self.seed += 1000003
+                self._start()
+            return
+        state.step(self.policy(state))
+
+
+class ReplayFeed:
+    """A recorded game played back at real speed; the final board stays on screen"""
+
+    def __init__(self, replay, label=""):
+        self.replay = replay
+        self.state = replay.new_game()
+        self.actions = replay.actions_by_tick()
+        self.label = label
+
+    def advance(self):
+        state = self.state
+        if state.game_over or state.ticks >= self.replay.end_tick:
+            return
+        state.step(self.actions.get(state.ticks, ()))
+
+
+def run(feeds, size=(1280, 720), fps=60, speed=1, frames=None, report=False):
+    """Show the feeds until the window is closed (or for `frames` frames) and return the frames drawn"""
+    screen = pygame.display.set_mode(size)
+    pygame.display.set_caption("Tetris - Spectator")
+    width, height = feeds[0].state.width, feeds[0].state.height
+    wall = SpectatorWall(screen, len(feeds), width, height)
+    clock = pygame.time.Clock()
+    labels = [feed.label for feed in feeds]
+    drawn = 0
+    busy = 0.0
+    while frames is None or drawn < frames:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                frames = drawn
+        if frames is not None and drawn >= frames:
+            break
+        start = time.perf_counter()
+        for _ in range(speed):
+            for feed in feeds:
+                feed.advance()
+        dirty = wall.draw([feed.state for feed in feeds], labels)
+        if dirty:
+            pygame.display.update(dirty)
+        busy += time.perf_counter() - start
+        drawn += 1
+        clock.tick(fps)
+    if report and drawn:
+        print(f"{drawn} frames, {len(feeds)} boards at block size {wall.block_size}: "
+              f"{busy / drawn * 1000:.2f} ms of work per frame")
+    return drawn
+
+
+def window_size(text):
+    """argparse type for a WIDTHxHEIGHT window size"""
+    try:
+        width, height = (int(n) for n in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {text!r}") from None
+    if width < 1 or height < 1:
+        raise argparse.ArgumentTypeError(f"window size must be positive, got {text!r}")
+    return width, height
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch many Tetris games at once")
+    parser.add_argument('replays', nargs='*', help="replay files to play back (default: bot games)")
+    parser.add_argument('--games', type=int, default=16, help="number of bot games")
+    parser.add_argument('--policy', default='watch',
+                        help=f"bot policy: watch, {', '.join(sorted(POLICIES))} or module:factory")
+    parser.add_argument('--randomizer', default='uniform', choices=sorted(RANDOMIZERS),
+                        help="piece randomizer for bot games")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first bot game")
+    parser.add_argument('--size', type=window_size, default='1280x720', help="window size, WIDTHxHEIGHT")
+    parser.add_argument('--fps', type=int, default=60, help="frame-rate cap")
+    parser.add_argument('--speed', type=int, default=1, help="game steps per frame")
+    parser.add_argument('--frames', type=int, default=None, help="quit after this many frames")
+    parser.add_argument('--report', action='store_true', help="print the average work per frame on exit")
+    args = parser.parse_args()
+    if args.games < 1:
+        parser.error("--games must be at least 1")
+    if args.speed < 1:
+        parser.error("--speed must be at least 1")
+
+    if args.replays:
+        feeds = []
+        for i, path in enumerate(args.replays):
+            try:
+                feeds.append(ReplayFeed(Replay.load(path), label=f"{i + 1}: "))
+            except (OSError, ReplayError) as e:
+                print(f"{path}: skipped: {e}")
+        if not feeds:
+            parser.error("no replays could be loaded")
+    else:
+        policy = watch_policy if args.policy == 'watch' else args.policy
+        feeds = [BotFeed(args.seed + i, policy, args.randomizer) for i in range(args.games)]
+    try:
+        layout(len(feeds), feeds[0].state.width, feeds[0].state.height, args.size)
+    except ValueError as e:
+        parser.error(str(e))
+
+    pygame.display.init()
+    pygame.font.init()
+    try:
+        run(feeds, args.size, args.fps, args.speed, args.frames, args.report)
+    finally:
+        pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,112 +1,222 @@
 #!/usr/bin/env python
 
+import time
+_IMPORT_START = time.perf_counter()
+
+import argparse
+import os
+import random
 import pygame
-from tetromino import Tetromino
-from lib import *
+from game import GameState
+from lib import draw_frame_stats
+from renderer import Renderer
+from replay import Replay
+from profiler import FrameProfiler
+from ai import AutoPlayer
+from controls import InputHandler, KEY_ACTIONS, MAX_FRAME_TIME
+from scenes import SceneManager, StartScene, GameOverScene, PLAY
+import snapshot
+from warmup import StartupTimer, Warmup, warm_menus
+
+REPLAY_DIR = 'replays'
+SAVE_FILE = os.path.join('saves', 'last.tsnp')
+
+def run_game(state, screen, clock, renderer, fps, recording=None, playback=None, profiler=None,
+             autoplay=None, controls=None):
+    """Drive one game until it ends; returns False if the window was closed.
+
+    Inputs come from the keyboard through `controls` (an InputHandler, which
+    repeats held keys), or from `playback` (a Replay) when given.
+    `autoplay` is an AutoPlayer that takes over the controls while switched
+    on with the A key.
+    Every step's inputs are added to `recording` if one is passed, and
+    frame phases are timed when a FrameProfiler is passed (F3 shows them).
+    """
+    accumulator = 0.0
+    controls = controls or InputHandler()
+    scripted = playback.actions_by_tick() if playback else None
+    renderer.invalidate()
+    state.profiler = profiler
+    stats_y = screen.get_height() - 150
+
+    while not state.game_over:
+        if playback and state.ticks >= playback.end_tick:
+            break
+        accumulator += min(clock.tick(fps) / 1000, MAX_FRAME_TIME)  # Convert to seconds
+        if profiler:
+            profiler.begin_frame()
+
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return False
+
+            if event.type == pygame.WINDOWFOCUSLOST:
+                controls.clear()
+            elif event.type == pygame.KEYUP:
+                if event.key in KEY_ACTIONS:
+                    controls.release(KEY_ACTIONS[event.key])
+            elif event.type == pygame.KEYDOWN:
+                if profiler and event.key == pygame.K_F3:
+                    profiler.overlay = not profiler.overlay
+                    renderer.invalidate()
+                elif playback:
+                    if event.key == pygame.K_ESCAPE:
+                        return True
+                elif autoplay and event.key == pygame.K_a:
+                    autoplay.toggle()
+                elif event.key in KEY_ACTIONS:
+                    controls.press(KEY_ACTIONS[event.key])
+        if profiler:
+            profiler.lap('events')
+
+        # Run as many fixed steps as real time allows; new key presses go to the first one
+        while accumulator >= state.step_time and not state.game_over:
+            accumulator -= state.step_time
+            if scripted is not None:
+                actions = scripted.get(state.ticks, [])
+            elif autoplay and autoplay.enabled:
+                actions = list(autoplay(state))
+                controls.actions()  # keep held-key timing running underneath
+            else:
+                actions = controls.actions()
+            if recording is not None:
+                recording.record(state.ticks, actions)
+            state.step(actions)
+
+        dirty = renderer.draw(state)
+        if profiler:
+            # Refresh the overlay four times a second, or when the panel under it was redrawn,
+            # so its own cost stays out of the numbers
+            if profiler.overlay and (renderer.panel in dirty or profiler.frames % 15 == 0):
+                dirty.append(draw_frame_stats(screen, profiler.stats(), renderer.panel.x + 5, stats_y))
+            profiler.lap('render')
+        if dirty:
+            pygame.display.update(dirty)
+        if profiler:
+            profiler.lap('flip')
+            profiler.end_frame()
+
+    return True
+
+def save_replay(recording):
+    path = os.path.join(REPLAY_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{recording.seed}.trp")
+    recording.save(path)
+    return path
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Tetris")
+    parser.add_argument('--replay', metavar='FILE', help="play back a recorded game at real speed")
+    parser.add_argument('--no-record', action='store_true',
+                        help=f"do not save a replay of each game to {REPLAY_DIR}/")
+    parser.add_argument('--resume', nargs='?', const=SAVE_FILE, metavar='FILE',
+                        help=f"continue a game saved when the window was closed (default {SAVE_FILE})")
+    parser.add_argument('--autoplay', action='store_true',
+                        help="let the computer play (press A in game to toggle)")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print import, init and first-frame timings")
+    parser.add_argument('--profile', action='store_true',
+                        help="time each frame phase; press F3 in game to show the overlay")
+    parser.add_argument('--profile-log', metavar='FILE',
+                        help="also append per-frame timings to FILE (.csv or .jsonl); implies --profile")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    timer = StartupTimer(_IMPORT_START)
+    timer.mark('imports')
+    args = parse_args(argv)
 
-def main():
-    # Initialize pygame
-    pygame.init()
-    
     # Game settings
     BLOCK_SIZE = 30
     GRID_WIDTH = 10
     GRID_HEIGHT = 20
     SCREEN_WIDTH = BLOCK_SIZE * (GRID_WIDTH + 6)
     SCREEN_HEIGHT = BLOCK_SIZE * GRID_HEIGHT
-    GAME_AREA = pygame.Rect(0, 0, BLOCK_SIZE * GRID_WIDTH, SCREEN_HEIGHT)
-    
+    FPS = 60  # Frame-rate cap; 0 renders as fast as possible
+    RANDOMIZER = 'uniform'  # Piece randomizer: 'uniform', 'bag' or 'history'
+    PREVIEW = 1  # Number of upcoming pieces shown
+    AUTOPLAY_INTERVAL = 4  # Steps between autoplay moves; 0 places each piece instantly
+    DAS = 10  # Steps (1/60 s) a sideways key is held before it repeats
+    ARR = 2  # Steps between repeated sideways moves
+    SOFT_DROP = 2  # Steps between rows while Down is held
+
+    # Only the subsystems the game uses; pygame.init() would also start audio and joysticks.
+    # Font lookups are slow, so they start on the warmup thread while the window opens
+    pygame.font.init()
+    warmup = Warmup()
+    menu_job = warmup.submit('menu text', warm_menus, (SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.init()
+    timer.mark('display init')
+
     # Set up the display
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
     pygame.display.set_caption("Tetris")
-    
+    timer.mark('window')
+    # Needs the window so its sprites can be converted to the display format
+    renderer = Renderer(screen, BLOCK_SIZE, GRID_WIDTH, GRID_HEIGHT, preview=PREVIEW)
+    timer.mark('renderer')
+
+    def first_frame():
+        timer.mark('first frame')
+        if args.startup_report:
+            print(timer.report())
+            menu_job.result()  # only so its time can be reported
+            print(warmup.report())
+
     clock = pygame.time.Clock()
-    
-    run = True
-    while run:
-        start_game, show_scores, show_credits = show_start_screen(screen)
-        if not start_game and not show_scores and not show_credits:
-            break
-        
-        if show_scores:
-            continue  
-
-        if show_credits:
-            continue  
-
-        grid = create_grid(GRID_WIDTH, GRID_HEIGHT)
-        current_piece = Tetromino(grid_width=GRID_WIDTH)
-        next_piece = Tetromino(grid_width=GRID_WIDTH)
-        change_piece = False
-        score = 0
-        fall_time = 0
-        fall_speed = 0.5  # seconds
-        
-        game_over = False
-        while not game_over:
-            fall_time += clock.get_rawtime() / 1000  # Convert to seconds
-            clock.tick()
-            
-            # Piece falling
-            if fall_time >= fall_speed:
-                fall_time = 0
-                current_piece.y += 1
-                if not valid_space(current_piece, grid):
-                    current_piece.y -= 1
-                    change_piece = True
-            
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    return
-                
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_LEFT:
-                        current_piece.x -= 1
-                        if not valid_space(current_piece, grid):
-                            current_piece.x += 1
-                    
-                    if event.key == pygame.K_RIGHT:
-                        current_piece.x += 1
-                        if not valid_space(current_piece, grid):
-                            current_piece.x -= 1
-                    
-                    if event.key == pygame.K_DOWN:
-                        current_piece.y += 1
-                        if not valid_space(current_piece, grid):
-                            current_piece.y -= 1
-                    
-                    if event.key == pygame.K_UP:
-                        rotated = current_piece.rotate()
-                        old_shape = current_piece.shape
-                        current_piece.shape = rotated
-                        if not valid_space(current_piece, grid):
-                            current_piece.shape = old_shape
-            
-            # Add piece to the grid
-            if change_piece:
-                for y in range(len(current_piece.shape)):
-                    for x in range(len(current_piece.shape[0])):
-                        if current_piece.shape[y][x]:
-                            grid[current_piece.y + y][current_piece.x + x] = current_piece.shape_idx + 1
-                
-                score = clear_rows(grid, score)
-                current_piece = next_piece
-                next_piece = Tetromino(grid_width=GRID_WIDTH)
-                change_piece = False
-                
-                if check_lost(grid):
-                    game_over = True
-            
-            screen.fill((0, 0, 0))
-            draw_grid(screen, grid, BLOCK_SIZE, Tetromino.COLORS, (128, 128, 128))
-            draw_tetromino(screen, current_piece, BLOCK_SIZE)
-            draw_score(screen, score, GAME_AREA.width + 10, 20)
-            draw_next_piece(screen, next_piece, GAME_AREA.width + 10, 100, BLOCK_SIZE)
-            pygame.display.update()
-        
-        if not show_game_over_screen(screen, score):
-            break
+    profiler = None
+    if args.profile or args.profile_log:
+        profiler = FrameProfiler(log_path=args.profile_log)
+
+    try:
+        if args.replay:
+            playback = Replay.load(args.replay)
+            run_game(playback.new_game(), screen, clock, renderer, FPS,
+                     playback=playback, profiler=profiler)
+            return
+
+        resume = None
+        if args.resume:
+            try:
+                resume = snapshot.load(args.resume)
+            except (OSError, snapshot.SnapshotError) as e:
+                raise SystemExit(f"Cannot resume from {args.resume}: {e}")
+            # The game's own save is used once; closing the window mid-game writes
+            # a new one. Snapshots passed by path are the user's to keep.
+            if os.path.abspath(args.resume) == os.path.abspath(SAVE_FILE):
+                os.remove(args.resume)
+
+        scenes = SceneManager(screen, on_first_frame=first_frame)
+        menu = StartScene()
+        while resume or scenes.run(menu) == PLAY:
+            if resume:
+                # A replay has to start from the first step, so resumed games are not recorded
+                state, recording, resume = resume, None, None
+            else:
+                # Every game is seeded so it can be recorded and replayed exactly
+                state = GameState(GRID_WIDTH, GRID_HEIGHT, seed=random.getrandbits(64), randomizer=RANDOMIZER)
+                recording = None if args.no_record else Replay.for_game(state)
+            autoplay = AutoPlayer(interval=AUTOPLAY_INTERVAL, enabled=args.autoplay)
+
+            controls = InputHandler(DAS, ARR, SOFT_DROP)
+
+            finished = run_game(state, screen, clock, renderer, FPS, recording=recording,
+                                profiler=profiler, autoplay=autoplay, controls=controls)
+            if recording is not None:
+                save_replay(recording)
+            if not finished:
+                if not state.game_over:
+                    snapshot.save(state, SAVE_FILE)
+                return
+            menu = GameOverScene(state.score)
+    except BaseException:
+        # Leaving on an error: do not start warmup work that is still queued
+        warmup.shutdown(cancel=True)
+        raise
+    finally:
+        # pygame.quit() must not run while the warmup thread is still using fonts
+        warmup.shutdown()
+        if profiler:
+            profiler.close()
 
 if __name__ == "__main__":
     main()
@@ -1,5 +1,38 @@
 import random
 
+
+class PieceState:
+    """One precomputed rotation of a shape: cells, bounding box, row masks
+    and the lowest cell of each column it covers"""
+    __slots__ = ('shape', 'cells', 'width', 'height', 'masks', 'bottoms')
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.cells = tuple((x, y) for y, row in enumerate(shape)
+                           for x, cell in enumerate(row) if cell)
+        self.width = len(shape[0])
+        self.height = len(shape)
+        self.masks = tuple(sum(1 << x for x, cell in enumerate(row) if cell) for row in shape)
+        self.bottoms = tuple((x, max(y for cx, y in self.cells if cx == x))
+                             for x in range(self.width) if any(cx == x for cx, _ in self.cells))
+
+
+def _rotate_shape(shape):
+    return [[shape[y][x] for y in range(len(shape))]
+            for x in range(len(shape[0]) - 1, -1, -1)]
+
+
+def _build_rotations(shapes):
+    table = []
+    for shape in shapes:
+        states = []
+        for _ in range(4):
+            states.append(PieceState(shape))
+            shape = _rotate_shape(shape)
+        table.append(tuple(states))
+    return tuple(table)
+
+
 class Tetromino:
     SHAPES = [
         [[1, 1, 1, 1]],  # I
@@ -10,7 +43,7 @@ class Tetromino:
         [[0, 1, 0], [1, 1, 1]],  # T
         [[1, 1, 0], [0, 1, 1]]   # Z
     ]
-    
+
     COLORS = [
         (0, 255, 255),  # Cyan - I
         (0, 0, 255),    # Blue - J
@@ -21,15 +54,37 @@ class Tetromino:
         (255, 0, 0)     # Red - Z
     ]
 
+    # ROTATIONS[shape_idx][rotation] -> PieceState, built once at import
+    ROTATIONS = _build_rotations(SHAPES)
+
+    __slots__ = ('shape_idx', 'rotation', 'x', 'y')
+
     def __init__(self, shape_idx=None, grid_width=10):
         self.shape_idx = random.randint(0, len(self.SHAPES) - 1) if shape_idx is None else shape_idx
-        self.shape = self.SHAPES[self.shape_idx]
-        self.color = self.COLORS[self.shape_idx]
-        self.x = grid_width // 2 - len(self.shape[0]) // 2
+        self.rotation = 0
+        self.x = grid_width // 2 - self.ROTATIONS[self.shape_idx][0].width // 2
         self.y = 0
-    
+
+    @property
+    def state(self):
+        return self.ROTATIONS[self.shape_idx][self.rotation]
+
+    @property
+    def shape(self):
+        return self.ROTATIONS[self.shape_idx][self.rotation].shape
+
+    @property
+    def masks(self):
+        return self.ROTATIONS[self.shape_idx][self.rotation].masks
+
+    @property
+    def cells(self):
+        return self.ROTATIONS[self.shape_idx][self.rotation].cells
+
+    @property
+    def color(self):
+        return self.COLORS[self.shape_idx]
+
     def rotate(self):
-        """Rotate the tetromino 90 degrees clockwise"""
-        rotated = [[self.shape[y][x] for y in range(len(self.shape))] 
-                  for x in range(len(self.shape[0]) - 1, -1, -1)]
-        return rotated
+        """Return the rotation index after turning the tetromino 90 degrees clockwise"""
+        return (self.rotation + 1) % 4
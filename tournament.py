@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""Run many headless games in parallel and stream per-game results to JSONL.
+
+Example:
+    python tournament.py --games 1000 --policy random --output results.jsonl
+"""
+import argparse
+import importlib
+import json
+import os
+import random
+import time
+from multiprocessing import Pool
+
+from game import GameState, ACTIONS, MOVE_DOWN
+from randomizer import RANDOMIZERS, make_randomizer
+from ai import AutoPlayer
+
+
+def idle_policy(rng):
+    """Never press anything; pieces fall under gravity"""
+    def policy(state):
+        return ()
+    return policy
+
+
+def random_policy(rng):
+    """Press a random key on roughly half of the steps"""
+    def policy(state):
+        if rng.random() < 0.5:
+            return (rng.choice(ACTIONS),)
+        return ()
+    return policy
+
+
+def drop_policy(rng):
+    """Shift and rotate at random, then hold down to drop quickly"""
+    def policy(state):
+        if rng.random() < 0.2:
+            return (rng.choice(ACTIONS),)
+        return (MOVE_DOWN,)
+    return policy
+
+
+def ai_policy(rng):
+    """Place every piece where the planner scores best, in a single step"""
+    return AutoPlayer()
+
+
+# A policy factory takes a seeded random.Random and returns a callable that
+# maps a GameState to the actions for the next step.
+POLICIES = {
+    'idle': idle_policy,
+    'random': random_policy,
+    'drop': drop_policy,
+    'ai': ai_policy,
+}
+
+
+def load_policy(spec):
+    """Resolve a built-in policy name or a `module:factory` path"""
+    if spec in POLICIES:
+        return POLICIES[spec]
+    if ':' not in spec:
+        raise ValueError(f"Unknown policy {spec!r}; use one of {sorted(POLICIES)} or module:factory")
+    module_name, attr = spec.split(':', 1)
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def policy_rng(seed):
+    """Random source for a policy playing the game with `seed`.
+
+    Randomizers seed a random.Random with the game seed, so a policy seeded
+    the same way would draw the very numbers that picked the pieces.
+    """
+    return random.Random(f"policy:{seed}")
+
+
+def play_game(seed, policy, max_ticks=None, randomizer='uniform'):
+    """Play one headless game to the end and return the finished GameState"""
+    state = GameState(seed=seed, randomizer=randomizer)
+    while not state.game_over and (max_ticks is None or state.ticks < max_ticks):
+        state.step(policy(state))
+    return state
+
+
+def run_game(task):
+    """Worker entry point: play one game described by `task` and return its result record"""
+    game_id, seed, policy_spec, max_ticks, randomizer = task
+    policy = load_policy(policy_spec)(policy_rng(seed))
+    start = time.perf_counter()
+    state = play_game(seed, policy, max_ticks, randomizer)
+    return {
+        'game_id': game_id,
+        'seed': seed,
+        'policy': policy_spec,
+        'randomizer': randomizer,
+        'score': state.score,
+        'lines': state.lines,
+        'pieces': state.pieces,
+        'ticks': state.ticks,
+        'finished': state.game_over,
+        'duration': round(time.perf_counter() - start, 6),
+    }
+
+
+def completed_games(path):
+    """Return the game ids already recorded in a results file"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r') as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)['game_id'])
+            except (ValueError, KeyError):
+                # A line cut short by an interrupted run; that game is replayed
+                continue
+    return done
+
+
+def _truncate_partial_line(path):
+    """Drop a trailing half-written record so appended results start on a new line"""
+    with open(path, 'rb+') as f:
+        data = f.read()
+        if data and not data.endswith(b'\n'):
+            f.truncate(data.rfind(b'\n') + 1)
+
+
+def run_tournament(games, policy, output, seed=0, workers=None, chunksize=16,
+                   max_ticks=None, resume=False, randomizer='uniform'):
+    """Play `games` games across a process pool, appending one JSON line per game.
+
+    Returns the number of games played by this call.
+    """
+    # Fail early on a bad spec rather than in every worker
+    load_policy(policy)
+    make_randomizer(randomizer)
+    done = set()
+    if resume and os.path.exists(output):
+        _truncate_partial_line(output)
+        done = completed_games(output)
+    tasks = [(game_id, seed + game_id, policy, max_ticks, randomizer)
+             for game_id in range(games) if game_id not in done]
+
+    played = 0
+    with open(output, 'a' if resume else 'w') as f, Pool(workers) as pool:
+        for result in pool.imap_unordered(run_game, tasks, chunksize=chunksize):
+            f.write(json.dumps(result) + '\n')
+            f.flush()
+            played += 1
+    return played
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless Tetris games in parallel")
+    parser.add_argument('--games', type=int, default=100, help="number of games to play")
+    parser.add_argument('--policy', default='random',
+                        help=f"built-in policy ({', '.join(sorted(POLICIES))}) or module:factory")
+    parser.add_argument('--randomizer', default='uniform', choices=sorted(RANDOMIZERS),
+                        help="piece randomizer")
+    parser.add_argument('--seed', type=int, default=0, help="seed of game 0; game N uses seed + N")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--chunksize', type=int, default=16, help="games handed to a worker at a time")
+    parser.add_argument('--max-ticks', type=int, default=None, help="stop unfinished games after this many steps")
+    parser.add_argument('--output', default='results.jsonl', help="JSONL file to write results to")
+    parser.add_argument('--resume', action='store_true', help="skip games already present in the output file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    played = run_tournament(args.games, args.policy, args.output, seed=args.seed,
+                            workers=args.workers, chunksize=args.chunksize,
+                            max_ticks=args.max_ticks, resume=args.resume,
+                            randomizer=args.randomizer)
+    print(f"Played {played} games in {time.perf_counter() - start:.2f}s -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
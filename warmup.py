@@ -0,0 +1,71 @@
+"""Startup timing and background warmup.
+
+Fonts and menu text are prepared on one background thread while the main
+thread opens the window. Anything the main thread needs first simply waits
+for it; font access is serialized by the lock in lib.py.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pygame
+
+from lib import render_text
+from scenes import StartScene, GameOverScene
+
+
+class StartupTimer:
+    """Named intervals since `start`, each measured from the previous mark"""
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self._last = self.start
+        self.marks = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.marks.append((name, now - self._last))
+        self._last = now
+
+    def report(self):
+        lines = [f"{name:24} {seconds * 1000:8.1f} ms" for name, seconds in self.marks]
+        lines.append(f"{'total':24} {(self._last - self.start) * 1000:8.1f} ms")
+        return '\n'.join(lines)
+
+
+class Warmup:
+    """Runs jobs in submission order on a single background thread"""
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='warmup')
+        self.timings = {}
+
+    def _timed(self, name, func, args, kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    def submit(self, name, func, *args, **kwargs):
+        """Queue `func(*args, **kwargs)` and return its Future"""
+        return self._executor.submit(self._timed, name, func, args, kwargs)
+
+    def report(self):
+        return '\n'.join(f"{name + ' (background)':24} {seconds * 1000:8.1f} ms"
+                         for name, seconds in self.timings.items())
+
+    def shutdown(self, cancel=False):
+        """Wait for the running job; with `cancel`, drop the jobs that have not started"""
+        self._executor.shutdown(wait=True, cancel_futures=cancel)
+
+
+def warm_menus(size):
+    """Look up the fonts and render the menu and in-game text by drawing them off screen"""
+    surface = pygame.Surface(size)
+    StartScene().draw(surface)
+    game_over = GameOverScene(0)
+    game_over.draw(surface)
+    game_over.entering = False
+    game_over.draw(surface)
+    render_text("Score: 0", 30)
+    render_text("Next:", 30)